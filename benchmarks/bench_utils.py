@@ -0,0 +1,38 @@
+"""
+Synthetic data sets and helpers for the benchmarks suite.
+"""
+import random
+import string
+
+# Fixed seed and console width, so that runs are reproducible between machines.
+SEED = 1234
+CONSOLE_WIDTH = 120
+TABLE_SIZES = [10, 1000, 10000]
+
+
+class NullWriter:
+    """
+    A writer (and a file-like object) which discards everything, in order to isolate formatting cost.
+    """
+
+    def write(self, text: str):
+        pass
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def random_text(rnd: random.Random, length: int) -> str:
+    return ''.join(rnd.choice(string.ascii_letters + ' ') for _ in range(length))
+
+
+def make_table_data(size: int, columns: int = 5, seed: int = SEED):
+    """
+    Creates a reproducible synthetic table data set.
+    """
+    rnd = random.Random(seed)
+    column_names = [f'column_{i}' for i in range(columns)]
+    return [{name: random_text(rnd, rnd.randint(1, 30)) for name in column_names} for _ in range(size)]
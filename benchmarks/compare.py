@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Compares two pytest-benchmark JSON reports and prints the differences as a table.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json [--threshold 10]
+
+The exit code is 1 if any benchmark became slower than the threshold (in percents).
+"""
+import argparse
+import json
+import sys
+from typing import Dict
+
+from pyprinter import get_printer, Table
+
+
+def _load_means(report_path: str) -> Dict[str, float]:
+    """
+    Loads a pytest-benchmark JSON report.
+
+    :param report_path: The path of the report.
+    :return: A map between each benchmark's full name and its mean time (in seconds).
+    """
+    with open(report_path, 'r') as report_file:
+        report = json.load(report_file)
+    return {benchmark['fullname']: benchmark['stats']['mean'] for benchmark in report['benchmarks']}
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> bool:
+    """
+    Prints the comparison table between the two reports.
+
+    :param baseline_path: The baseline report path.
+    :param current_path: The current report path.
+    :param threshold: The allowed slowdown, in percents.
+    :return: True if there were no regressions.
+    """
+    printer = get_printer()
+    baseline = _load_means(baseline_path)
+    current = _load_means(current_path)
+    rows = []
+    regressions = 0
+    for name in sorted(set(baseline) & set(current)):
+        change = (current[name] - baseline[name]) * 100 / baseline[name]
+        if change > threshold:
+            regressions += 1
+            color = printer.RED
+        elif change < -threshold:
+            color = printer.GREEN
+        else:
+            color = printer.NORMAL
+        rows.append({'Benchmark': name, 'Baseline (us)': f'{baseline[name] * 1e6:.1f}',
+                     'Current (us)': f'{current[name] * 1e6:.1f}', 'Change': f'{color}{change:+.1f}%{printer.NORMAL}'})
+    if rows:
+        Table('Benchmarks Comparison', rows, column_size_map={'Benchmark': 80}).pretty_print(printer)
+    for name in sorted(set(baseline) ^ set(current)):
+        report_name = 'baseline' if name in baseline else 'current'
+        printer.write_line(printer.DARK_YELLOW + f'{name} exists only in {report_name}')
+    if regressions:
+        printer.write_line(printer.RED + f'{regressions} benchmarks are slower by more than {threshold}%')
+    return regressions == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two pytest-benchmark JSON reports.')
+    parser.add_argument('baseline', help='The baseline report path.')
+    parser.add_argument('current', help='The current report path.')
+    parser.add_argument('--threshold', type=float, default=10, help='The allowed slowdown, in percents.')
+    args = parser.parse_args()
+    sys.exit(0 if compare(args.baseline, args.current, args.threshold) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Shared fixtures for the benchmarks suite.
+
+Run the suite with pytest-benchmark (pip install -e .[benchmark]):
+    pytest benchmarks --benchmark-autosave
+
+Compare against a saved baseline:
+    pytest benchmarks --benchmark-json=current.json
+    python benchmarks/compare.py baseline.json current.json
+"""
+import random
+
+import pytest
+
+from bench_utils import CONSOLE_WIDTH, NullWriter, SEED
+from pyprinter import printer
+
+
+@pytest.fixture(autouse=True)
+def fixed_console_width(monkeypatch):
+    monkeypatch.setattr(printer, 'get_console_width', lambda: CONSOLE_WIDTH)
+    for module_name in ('pyprinter.table', 'pyprinter.progress_bar'):
+        monkeypatch.setattr(f'{module_name}.get_console_width', lambda: CONSOLE_WIDTH)
+
+
+@pytest.fixture
+def null_writer() -> NullWriter:
+    return NullWriter()
+
+
+@pytest.fixture
+def rnd() -> random.Random:
+    return random.Random(SEED)
@@ -0,0 +1,32 @@
+import pytest
+
+from pyprinter import FileSize, Printer
+
+SIZE_STRINGS = ['1,600 KB', '12mb', '3.5 GB', '1024', '2tb', '17 b']
+
+
+def test_parse(benchmark):
+    benchmark(lambda: [FileSize(size) for size in SIZE_STRINGS * 100])
+
+
+@pytest.mark.parametrize('size', [17, 1600 * 1024, 3 * 1024 ** 3, 2 * 1024 ** 4], ids=['b', 'kb', 'gb', 'tb'])
+def test_format(benchmark, size):
+    file_size = FileSize(size)
+    benchmark(lambda: [str(file_size) for _ in range(100)])
+
+
+def test_arithmetic(benchmark):
+    first = FileSize('3 GB')
+    second = FileSize('700 MB')
+
+    def calculate():
+        for _ in range(100):
+            ((first + second - 1024) * 2 / 3 // 2) < first
+
+    benchmark(calculate)
+
+
+def test_pretty_print(benchmark, null_writer):
+    printer = Printer(null_writer)
+    file_size = FileSize('1,600 KB')
+    benchmark(file_size.pretty_print, printer, min_width=10, min_unit_width=2)
@@ -0,0 +1,83 @@
+import pytest
+
+from bench_utils import random_text
+from pyprinter import get_console_width, Printer
+
+
+@pytest.fixture
+def lines(rnd):
+    return [random_text(rnd, rnd.randint(10, 300)) for _ in range(100)]
+
+
+@pytest.mark.parametrize('colors', [True, False])
+@pytest.mark.parametrize('width_limit', [True, False])
+def test_write(benchmark, null_writer, lines, colors, width_limit):
+    printer = Printer(null_writer, colors=colors, width_limit=width_limit)
+    text = ''.join(Printer.YELLOW + line + Printer.NORMAL for line in lines)
+    benchmark(printer.write, text)
+
+
+@pytest.mark.parametrize('colors', [True, False])
+def test_write_line(benchmark, null_writer, lines, colors):
+    printer = Printer(null_writer, colors=colors)
+
+    def write_lines():
+        for line in lines:
+            printer.write_line(Printer.GREEN + line)
+
+    benchmark(write_lines)
+
+
+def test_write_line_in_groups(benchmark, null_writer, lines):
+    printer = Printer(null_writer)
+
+    def write_grouped_lines():
+        with printer.group(indent=4):
+            for line in lines:
+                with printer.group(indent=2):
+                    printer.write_line(printer.red(line))
+
+    benchmark(write_grouped_lines)
+
+
+def test_write_aligned(benchmark, null_writer, rnd):
+    printer = Printer(null_writer)
+    pairs = [(random_text(rnd, 10), random_text(rnd, 40)) for _ in range(100)]
+
+    def write_aligned():
+        for key, value in pairs:
+            printer.write_aligned(key, value, align_size=20)
+
+    benchmark(write_aligned)
+
+
+def test_color_functions(benchmark, null_writer):
+    printer = Printer(null_writer)
+    benchmark(lambda: [printer.yellow(printer.red('text')) for _ in range(1000)])
+
+
+def test_get_console_width(benchmark, monkeypatch):
+    # Measure the real lookup, not the fixed width fixture.
+    monkeypatch.undo()
+    benchmark(get_console_width)
+
+
+def test_write_aligned_many(benchmark, null_writer, rnd):
+    printer = Printer(null_writer)
+    pairs = [(random_text(rnd, 10), random_text(rnd, 40)) for _ in range(100)]
+    benchmark(printer.write_aligned_many, pairs, align_size=20)
+
+
+@pytest.mark.parametrize('raw', [False, True], ids=['tty_mode', 'pipe_mode'])
+def test_write_line_modes(benchmark, null_writer, lines, raw):
+    """
+    The throughput gap between terminal printing and raw (pipe) printing.
+    """
+    printer = Printer(null_writer, raw=raw)
+
+    def write_lines():
+        with printer.group(indent=4):
+            for line in lines:
+                printer.write_line(Printer.GREEN + line)
+
+    benchmark(write_lines)
@@ -0,0 +1,91 @@
+import io
+import sys
+
+import pytest
+
+from pyprinter import ProgressBar, ProgressBarIterator
+
+ITERATIONS = 10000
+
+
+@pytest.fixture(autouse=True)
+def null_stdout(monkeypatch, null_writer):
+    # The progress bar prints straight to stdout.
+    monkeypatch.setattr(sys, 'stdout', null_writer)
+
+
+@pytest.mark.parametrize('total', [ITERATIONS, None], ids=['with_total', 'without_total'])
+def test_progress_bar_inc(benchmark, total):
+    def run():
+        progress_bar = ProgressBar(total)
+        for _ in range(ITERATIONS):
+            progress_bar.inc()
+        progress_bar.finish()
+
+    benchmark(run)
+
+
+def test_progress_bar_iterator(benchmark):
+    benchmark(lambda: sum(ProgressBarIterator(range(ITERATIONS))))
+
+
+def test_plain_iteration(benchmark):
+    # The baseline for the per-iteration overhead of the progress bar iterator.
+    benchmark(lambda: sum(range(ITERATIONS)))
+
+
+class CountingWriter:
+    """
+    A stdout replacement which only counts the written bytes.
+    """
+
+    def __init__(self):
+        self.bytes_count = 0
+
+    def write(self, text: str):
+        self.bytes_count += len(text.encode())
+
+    def flush(self):
+        pass
+
+
+@pytest.mark.parametrize('differential', [True, False], ids=['differential', 'full_redraw'])
+def test_progress_bar_bytes(benchmark, monkeypatch, differential):
+    def run():
+        counting_writer = CountingWriter()
+        monkeypatch.setattr(sys, 'stdout', counting_writer)
+        progress_bar = ProgressBar(ITERATIONS, differential=differential)
+        for i in range(ITERATIONS):
+            progress_bar.eval(i)
+        progress_bar.finish()
+        return counting_writer.bytes_count
+
+    # The bytes sent to the terminal are the interesting number on slow links (like ssh).
+    benchmark.extra_info['bytes'] = benchmark(run)
+
+
+STREAM_SIZE = 64 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+@pytest.fixture(scope='module')
+def stream_data():
+    return bytes(STREAM_SIZE)
+
+
+def _read_all(stream, buffer):
+    while stream.readinto(buffer):
+        pass
+
+
+@pytest.mark.parametrize('wrapped', [True, False], ids=['wrapped', 'plain'])
+def test_stream_readinto(benchmark, stream_data, wrapped):
+    buffer = bytearray(CHUNK_SIZE)
+
+    def run():
+        stream = io.BytesIO(stream_data)
+        if wrapped:
+            stream = ProgressBar.wrap_stream(stream, total=STREAM_SIZE)
+        _read_all(stream, buffer)
+
+    benchmark(run)
@@ -0,0 +1,64 @@
+import pytest
+
+from bench_utils import make_table_data, TABLE_SIZES
+from pyprinter import FileSize, LiveTable, Printer, Table
+
+
+@pytest.fixture(params=TABLE_SIZES, ids=lambda size: f'{size}_rows')
+def table(request):
+    return Table('Benchmark', make_table_data(request.param))
+
+
+@pytest.mark.parametrize('border', [False, True])
+def test_pretty_print(benchmark, null_writer, table, border):
+    printer = Printer(null_writer)
+    benchmark(table.pretty_print, printer, border=border)
+
+
+def test_get_as_csv(benchmark, table):
+    benchmark(table.get_as_csv)
+
+
+def test_get_as_html(benchmark, table):
+    benchmark(table.get_as_html)
+
+
+@pytest.mark.parametrize('size', TABLE_SIZES, ids=lambda size: f'{size}_rows')
+def test_live_table_refresh(benchmark, null_writer, size):
+    """
+    Appends a few rows to a big live table and reprints it, like a dashboard refresh.
+    """
+    data = make_table_data(size + 1000)
+    printer = Printer(null_writer)
+    live_table = LiveTable('Benchmark', list(data[0].keys()), data[:size])
+    new_rows = iter(data[size:])
+
+    def refresh():
+        for _ in range(5):
+            live_table.append(next(new_rows))
+        live_table.pretty_print(printer)
+
+    benchmark.pedantic(refresh, rounds=100)
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_parallel_pretty_print(benchmark, null_writer, workers):
+    table = Table('Benchmark', make_table_data(20000))
+    printer = Printer(null_writer)
+    benchmark.pedantic(table.pretty_print, args=(printer,), kwargs={'workers': workers}, rounds=3)
+
+
+@pytest.mark.parametrize('typed', [False, True], ids=['str', 'typed'])
+def test_typed_pretty_print(benchmark, null_writer, typed):
+    """
+    Prints a numeric table, either pre-formatted as strings or with typed columns.
+    """
+    data = [{'id': i, 'size': i * 1031, 'ratio': i / 7, 'count': i * 3} for i in range(10000)]
+    if typed:
+        table = Table('Benchmark', data, column_types={'id': int, 'size': FileSize, 'ratio': (float, 2),
+                                                       'count': int})
+    else:
+        table = Table('Benchmark', [{'id': str(row['id']), 'size': str(FileSize(row['size'])),
+                                     'ratio': f'{row["ratio"]:.2f}', 'count': str(row['count'])} for row in data])
+    printer = Printer(null_writer)
+    benchmark.pedantic(table.pretty_print, args=(printer,), rounds=5)
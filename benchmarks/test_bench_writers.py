@@ -0,0 +1,81 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from bench_utils import make_table_data
+from pyprinter import CompressedWriter, DefaultWriter, FileWriter, Printer, RingBufferWriter, Table, TeeSink, TeeWriter
+
+
+@pytest.fixture(scope='module')
+def table():
+    return Table('Benchmark', make_table_data(10000))
+
+
+def test_default_writer_to_file(benchmark, tmp_path, table):
+    def render():
+        with open(tmp_path / 'output.txt', 'w') as output_file:
+            table.pretty_print(Printer(DefaultWriter(output_file), colors=False, width_limit=False))
+
+    benchmark(render)
+
+
+def test_file_writer(benchmark, tmp_path, table):
+    def render():
+        with FileWriter(str(tmp_path / 'output.txt')) as writer:
+            table.pretty_print(Printer(writer, colors=False, width_limit=False))
+
+    benchmark(render)
+
+
+def test_two_printers(benchmark, null_writer, table):
+    printers = [Printer(null_writer), Printer(null_writer, colors=False)]
+    benchmark(lambda: [table.pretty_print(printer) for printer in printers])
+
+
+def test_tee_writer(benchmark, null_writer, table):
+    with TeeWriter([TeeSink(null_writer), TeeSink(null_writer, colors=False)]) as tee_writer:
+        printer = Printer(tee_writer)
+
+        def render():
+            table.pretty_print(printer)
+            tee_writer.flush()
+
+        benchmark(render)
+
+
+@pytest.fixture
+def lines():
+    return [f'line number {i} of the always-on capture benchmark\n' for i in range(10000)]
+
+
+def test_default_writer_to_dev_null(benchmark, lines):
+    with open(os.devnull, 'w') as null_file:
+        writer = DefaultWriter(null_file)
+        benchmark(lambda: [writer.write(line) for line in lines])
+
+
+def test_ring_buffer_writer(benchmark, lines):
+    writer = RingBufferWriter(size=1024 * 1024)
+    benchmark(lambda: [writer.write(line) for line in lines])
+
+
+def test_compressed_writer(benchmark, tmp_path, table):
+    def render():
+        with CompressedWriter(str(tmp_path / 'output.txt.gz')) as writer:
+            table.pretty_print(Printer(writer, colors=False, width_limit=False))
+
+    benchmark(render)
+
+
+def test_write_then_compress(benchmark, tmp_path, table):
+    def render():
+        output_file_path = str(tmp_path / 'output.txt')
+        with FileWriter(output_file_path) as writer:
+            table.pretty_print(Printer(writer, colors=False, width_limit=False))
+        with open(output_file_path, 'rb') as input_file, gzip.open(output_file_path + '.gz', 'wb') as output_file:
+            shutil.copyfileobj(input_file, output_file)
+        os.remove(output_file_path)
+
+    benchmark(render)
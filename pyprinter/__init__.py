@@ -1,6 +1,9 @@
 from .printer import *
+from .instrumentation import *
+from .writers import *
 from .file_size import FileSize
-from .progress_bar import ProgressBar, ProgressBarIterator
-from .table import Table
+from .progress_bar import AsyncProgressBarIterator, ProgressBar, ProgressBarIterator
+from .profiler import FunctionStats, profile, Profile
+from .table import LiveTable, Table, TableDiff, TableView
 
 __version__ = '1.5.3'
@@ -1,4 +1,7 @@
-from typing import Optional, Tuple, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor
+import os
+import queue
+from typing import Dict, List, Optional, Tuple, TypeVar, Union
 
 from pyprinter import get_printer, Printer
 
@@ -92,6 +95,145 @@ class FileSize:
     def get_file_size_string(size_bytes: int) -> str:
         return str(FileSize(size_bytes))
 
+    @classmethod
+    def of_path(cls, path: str, workers: Optional[int] = None, follow_symlinks: bool = False) -> _FileSizeType:
+        """
+        Returns the size of a file, or the total size of the files in a directory tree.
+
+        :param path: The path of the file or directory.
+        :param workers: The number of threads to scan directories with (default is like ThreadPoolExecutor's).
+        :param follow_symlinks: If True, symbolic links are followed (and counted as the files they point to).
+        :return: The size of the path.
+        """
+        if os.path.isdir(path):
+            return cls.scan_tree(path, workers=workers, follow_symlinks=follow_symlinks)[path]
+        return cls(os.stat(path, follow_symlinks=follow_symlinks).st_size)
+
+    @classmethod
+    def scan_tree(cls, path: str, workers: Optional[int] = None,
+                  follow_symlinks: bool = False) -> Dict[str, _FileSizeType]:
+        """
+        Scans a directory tree, and returns the total size of the files under every directory in it (like du does).
+        Directories are scanned in parallel, and files with several hard links are only counted once (in the
+        directory of their lexicographically smallest path, so that the results don't depend on the scan order).
+        Sizes are the apparent sizes of the files (like du --apparent-size), and unreadable directories are skipped.
+
+        :param path: The path of the root directory.
+        :param workers: The number of threads to scan directories with (default is like ThreadPoolExecutor's).
+        :param follow_symlinks: If True, symbolic links are followed (and counted as the files they point to).
+        :return: A dictionary between every directory path (starting with the given path) and its total size.
+        """
+        if not os.path.isdir(path):
+            raise NotADirectoryError(f'{path} is not a directory!')
+        # The parent of every discovered directory, in the discovery order.
+        parents = {path: None}
+        own_sizes = {}
+        # The chosen path (the smallest one), directory and size of every file with several hard links.
+        linked_files = {}
+        seen_directories = set()
+        if follow_symlinks:
+            root_stat = os.stat(path)
+            seen_directories.add((root_stat.st_dev, root_stat.st_ino))
+        results = queue.Queue()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(directory_path: str):
+                executor.submit(cls._scan_directory, directory_path, follow_symlinks).add_done_callback(results.put)
+
+            submit(path)
+            pending = 1
+            while pending > 0:
+                directory_path, own_size, directory_linked_files, sub_directories = results.get().result()
+                pending -= 1
+                for file_id, file_path, size in directory_linked_files:
+                    linked_file = linked_files.get(file_id)
+                    if linked_file is None or file_path < linked_file[0]:
+                        linked_files[file_id] = (file_path, directory_path, size)
+                own_sizes[directory_path] = own_size
+                for sub_directory_path, directory_id in sub_directories:
+                    # Followed links may lead to an already scanned directory (or to a loop).
+                    if directory_id is not None:
+                        if directory_id in seen_directories:
+                            continue
+                        seen_directories.add(directory_id)
+                    parents[sub_directory_path] = directory_path
+                    submit(sub_directory_path)
+                    pending += 1
+
+        for _, directory_path, size in linked_files.values():
+            own_sizes[directory_path] += size
+        # Directories are always discovered after their parents, so going backwards rolls the sizes up.
+        total_sizes = own_sizes
+        for directory_path in reversed(list(parents)):
+            parent = parents[directory_path]
+            if parent is not None:
+                total_sizes[parent] += total_sizes[directory_path]
+        return {directory_path: cls(total_sizes[directory_path]) for directory_path in parents}
+
+    @staticmethod
+    def _scan_directory(path: str, follow_symlinks: bool) -> Tuple[str, int, List[Tuple[Tuple[int, int], str, int]],
+                                                                   List[Tuple[str, Optional[Tuple[int, int]]]]]:
+        """
+        Scans a single directory (without its sub directories).
+
+        :return: The directory path, the size of its files, the ids, paths and sizes of its files which have several
+                 hard links (which should be counted only once), and its sub directories (with their ids if followed).
+        """
+        own_size = 0
+        linked_files = []
+        sub_directories = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            directory_id = None
+                            if follow_symlinks:
+                                directory_stat = entry.stat()
+                                directory_id = (directory_stat.st_dev, directory_stat.st_ino)
+                            sub_directories.append((entry.path, directory_id))
+                            continue
+                        # On most platforms this stat comes cached from the directory listing.
+                        file_stat = entry.stat(follow_symlinks=follow_symlinks)
+                    except OSError:
+                        # Broken links and files which were deleted during the scan.
+                        continue
+                    if file_stat.st_nlink > 1:
+                        linked_files.append(((file_stat.st_dev, file_stat.st_ino), entry.path, file_stat.st_size))
+                    else:
+                        own_size += file_stat.st_size
+        except OSError:
+            pass
+        return path, own_size, linked_files, sub_directories
+
+    @staticmethod
+    def get_tree_table(sizes: Dict[str, _FileSizeType], title: str = 'Disk Usage', top: Optional[int] = None,
+                       colors: bool = True):
+        """
+        Returns a du-style table of directory sizes (like the ones returned by scan_tree), from the biggest.
+
+        :param sizes: A dictionary between paths and their sizes.
+        :param title: The title of the table.
+        :param top: The number of biggest directories to show, or None to show all of them.
+        :param colors: If True, the size units will be colored.
+        :return: The table.
+        """
+        from pyprinter.table import Table
+
+        biggest = sorted(sizes.items(), key=lambda item: item[1].size, reverse=True)[:top]
+        data = []
+        for path, size in biggest:
+            size_string = size._get_colored_string() if colors else str(size)
+            data.append({'Size': size_string, 'Path': path})
+        return Table(title, data, column_size_map={'Path': 80})
+
+    def _get_colored_string(self) -> str:
+        """
+        Returns the file size string, with its unit colored like pretty_print does.
+        """
+        unit, unit_divider = self._unit_info()
+        size_in_unit = (self.size * 100) / unit_divider / 100
+        return f'{size_in_unit:.1f} {self.SIZE_COLORS[unit]}{unit}{Printer.NORMAL}'
+
     def __add__(self, file_size: Union[int, float, _FileSizeType]) -> _FileSizeType:
         """
         Handles adding numbers or file sizes to the file size.
@@ -0,0 +1,191 @@
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+"""
+Optional instrumentation of the printing hot paths.
+
+Collects call counts and cumulative time of the main printing functions, along with a few counters
+(bytes written, lines wrapped, color codes processed and console width lookups).
+Instrumentation is disabled by default, in which case the timed functions are not wrapped at all (their timing
+wrappers are only swapped in while enabled), and the counters cost a single attribute check.
+It can be enabled by calling `enable_stats`, or by setting the PYPRINTER_STATS environment variable.
+Note that functions imported from pyprinter before enabling it (`from pyprinter import get_console_width`) aren't timed.
+
+Example:
+    import pyprinter
+
+    pyprinter.enable_stats()
+    pyprinter.get_printer().write_line('Hello World!')
+    print(pyprinter.stats()['timings']['Printer.write'])
+
+    # Push the stats to a metrics agent at most once every 10 seconds.
+    pyprinter.set_stats_hook(lambda snapshot: agent.send(snapshot), interval=10)
+"""
+
+_COUNTERS = ('bytes_written', 'lines_wrapped', 'color_codes', 'console_width_lookups')
+
+
+class _Stats:
+    """
+    The statistics collector. There should be only one instance of it (the module's _stats).
+    """
+
+    def __init__(self):
+        self.enabled = bool(os.getenv('PYPRINTER_STATS'))
+        self._lock = threading.Lock()
+        self._timings = {}
+        self._counters = dict.fromkeys(_COUNTERS, 0)
+        self._hook = None
+        self._hook_interval = 0
+        self._last_push = 0
+
+    def add_timing(self, name: str, elapsed: float):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = [0, 0.0]
+            timing[0] += 1
+            timing[1] += elapsed
+        self._maybe_push()
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'timings': {name: {'calls': calls, 'total_time': total_time}
+                            for name, (calls, total_time) in self._timings.items()},
+                'counters': dict(self._counters)
+            }
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
+            self._counters = dict.fromkeys(_COUNTERS, 0)
+
+    def set_hook(self, hook: Optional[Callable[[Dict], None]], interval: float):
+        self._hook = hook
+        self._hook_interval = interval
+        self._last_push = time.monotonic()
+
+    def push(self):
+        if self._hook is not None:
+            self._last_push = time.monotonic()
+            self._hook(self.snapshot())
+
+    def _maybe_push(self):
+        if self._hook is not None and time.monotonic() - self._last_push >= self._hook_interval:
+            self.push()
+
+
+_stats = _Stats()
+# The timed functions, as (function, timing wrapper) pairs.
+_timed_functions = []
+
+
+def timed(name: str):
+    """
+    A decorator which counts the calls of the decorated function and their cumulative time (when enabled).
+    The timing wrapper is only used while the stats are enabled, so the function costs nothing extra otherwise.
+
+    :param name: The name to report the function's timing under.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _stats.add_timing(name, time.perf_counter() - start_time)
+
+        _timed_functions.append((func, wrapper))
+        return wrapper if _stats.enabled else func
+
+    return decorator
+
+
+def _swap_timed_functions(enabled: bool):
+    """
+    Swaps the timing wrappers in place of the timed functions (or the other way around).
+
+    :param enabled: Whether to swap the wrappers in (or out).
+    """
+    for func, wrapper in _timed_functions:
+        old_function, new_function = (func, wrapper) if enabled else (wrapper, func)
+        *owner_path, attribute = func.__qualname__.split('.')
+        if owner_path:
+            owners = [functools.reduce(getattr, owner_path, sys.modules[func.__module__])]
+        else:
+            # Module functions may be imported by the other modules of the package as well.
+            owners = [module for module_name, module in list(sys.modules.items())
+                      if module_name == __package__ or module_name.startswith(__package__ + '.')]
+        for owner in owners:
+            if vars(owner).get(attribute) is old_function:
+                setattr(owner, attribute, new_function)
+
+
+def enable_stats():
+    """
+    Starts collecting printing statistics.
+    """
+    if not _stats.enabled:
+        _stats.enabled = True
+        _swap_timed_functions(True)
+
+
+def disable_stats():
+    """
+    Stops collecting printing statistics (the already collected statistics are kept).
+    """
+    if _stats.enabled:
+        _stats.enabled = False
+        _swap_timed_functions(False)
+
+
+def reset_stats():
+    """
+    Clears all the collected statistics.
+    """
+    _stats.reset()
+
+
+def stats() -> Dict:
+    """
+    Returns a snapshot of the collected statistics, i.e.:
+
+        {'enabled': True,
+         'timings': {'Printer.write': {'calls': 2, 'total_time': 0.0001}, ...},
+         'counters': {'bytes_written': 30, 'lines_wrapped': 0, 'color_codes': 4, 'console_width_lookups': 2}}
+
+    :return: A dictionary containing the statistics.
+    """
+    return _stats.snapshot()
+
+
+def set_stats_hook(hook: Optional[Callable[[Dict], None]], interval: float = 10.0):
+    """
+    Sets a hook which periodically receives a statistics snapshot (for example, to push it to a metrics agent).
+    The hook is called from the printing thread, so it should be fast.
+
+    :param hook: A function receiving the stats snapshot, or None to remove the current hook.
+    :param interval: The minimal number of seconds between two hook calls.
+    """
+    _stats.set_hook(hook, interval)
+
+
+def push_stats():
+    """
+    Immediately calls the stats hook (if there is one) with a fresh snapshot.
+    """
+    _stats.push()
+
+
+__all__ = ['enable_stats', 'disable_stats', 'reset_stats', 'stats', 'set_stats_hook', 'push_stats']
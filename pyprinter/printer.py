@@ -1,8 +1,15 @@
+from collections.abc import Iterator as IteratorABC, Mapping
+from contextlib import contextmanager
+from itertools import islice
 import os
 import re
 import subprocess
 import sys
-from typing import List, Optional
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import weakref
+
+from pyprinter.instrumentation import _stats, timed
 
 # True if printer is in QT console context.
 _IN_QT = None
@@ -23,10 +30,93 @@ class DefaultWriter:
         self.output_file = output_file or sys.stdout
         self.disabled = disabled
 
+    @timed('DefaultWriter.write')
     def write(self, text: str):
         if not self.disabled:
+            if _stats.enabled:
+                _stats.count('bytes_written', len(text.encode('UTF-8', 'replace')))
             print(text, end='', file=self.output_file)
 
+    def isatty(self) -> bool:
+        """
+        Returns True if the output file is a terminal.
+        """
+        isatty = getattr(self.output_file, 'isatty', None)
+        return isatty is not None and isatty()
+
+
+class FormattedLine(NamedTuple):
+    """
+    A single formatted line, as passed to writers which support the write_formatted method (like TeeWriter).
+    Such writers receive the formatting information, instead of the final text.
+    """
+
+    # The indentation to print before the line (empty if the line continues the current line).
+    indent: str
+    # The line's text, including its colors and line break.
+    text: str
+    # True if the line break was added by the width limiting (and not by the printed text itself).
+    soft_break: bool
+
+
+class Style(str):
+    """
+    An immutable, precompiled ANSI style (foreground/background color, bold, 256 colors or true colors).
+    Styles are strings, so they can be concatenated with text just like plain color codes.
+    Calling a style wraps the given text with it, and resets the color afterwards.
+    """
+
+    _RESET = '\x1b[0;0m'
+
+    def __new__(cls, *codes: int):
+        """
+        Creates a style from its SGR codes, i.e. Style(1, 33) is yellow and Style(1, 33, 44) adds a blue background.
+
+        :param codes: The SGR codes of the style.
+        """
+        style = super().__new__(cls, '\x1b[' + ';'.join(str(code) for code in codes) + 'm')
+        style.codes = codes
+        return style
+
+    def __getnewargs__(self):
+        return self.codes
+
+    @classmethod
+    def color256(cls, index: int, background: bool = False) -> 'Style':
+        """
+        Returns a style of one of the 256 colors palette.
+
+        :param index: The color index (0-255).
+        :param background: If True, the color will be applied to the background.
+        """
+        return cls(48 if background else 38, 5, index)
+
+    @classmethod
+    def rgb(cls, red: int, green: int, blue: int, background: bool = False) -> 'Style':
+        """
+        Returns a true color (24-bit) style.
+
+        :param red: The red component (0-255).
+        :param green: The green component (0-255).
+        :param blue: The blue component (0-255).
+        :param background: If True, the color will be applied to the background.
+        """
+        return cls(48 if background else 38, 2, red, green, blue)
+
+    def __or__(self, other: 'Style') -> 'Style':
+        """
+        Combines two styles into one (i.e. a foreground color and a background color).
+        """
+        return Style(*self.codes, *other.codes)
+
+    def __call__(self, text: str) -> str:
+        # The text will be wrapped, and the rest of the text color will be normal.
+        wrapped_text = self + text
+        # No need to duplicate normal color suffix.
+        if not wrapped_text.endswith(self._RESET):
+            wrapped_text += self._RESET
+        return wrapped_text
+
 
 class _TextGroup:
     """
@@ -45,11 +135,13 @@ class _TextGroup:
             self.printer._is_first_line = True
         self.printer._indents.append(self.unit)
         self.printer.indents_sum += self.unit
+        self.printer._indent_prefix = ' ' * self.printer.indents_sum
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.printer._is_first_line = False
         self.printer._indents.pop()
         self.printer.indents_sum -= self.unit
+        self.printer._indent_prefix = ' ' * self.printer.indents_sum
         # Treat this like a line break.
         if self._add_line and self.printer._in_line:
             self.printer.write_line()
@@ -66,48 +158,81 @@ class Printer:
 
     # ANSI Color codes constants.
     _ANSI_COLOR_PREFIX = '\x1b'
-    _ANSI_REGEXP = re.compile('\x1b\\[(\\d;)?(\\d+)m')
-    _ANSI_COLOR_CODE = f'{_ANSI_COLOR_PREFIX}[%s%dm'
-    _DARK_CODE = '0;'
-    _LIGHT_CODE = '1;'
-
-    NORMAL = _ANSI_COLOR_CODE % (_DARK_CODE, 0)
-    DARK_RED = _ANSI_COLOR_CODE % (_DARK_CODE, 31)
-    DARK_GREEN = _ANSI_COLOR_CODE % (_DARK_CODE, 32)
-    DARK_YELLOW = _ANSI_COLOR_CODE % (_DARK_CODE, 33)
-    DARK_BLUE = _ANSI_COLOR_CODE % (_DARK_CODE, 34)
-    DARK_PURPLE = _ANSI_COLOR_CODE % (_DARK_CODE, 35)
-    DARK_CYAN = _ANSI_COLOR_CODE % (_DARK_CODE, 36)
-    GREY = _ANSI_COLOR_CODE % (_DARK_CODE, 37)
-    RED = _ANSI_COLOR_CODE % (_LIGHT_CODE, 31)
-    GREEN = _ANSI_COLOR_CODE % (_LIGHT_CODE, 32)
-    YELLOW = _ANSI_COLOR_CODE % (_LIGHT_CODE, 33)
-    BLUE = _ANSI_COLOR_CODE % (_LIGHT_CODE, 34)
-    PURPLE = _ANSI_COLOR_CODE % (_LIGHT_CODE, 35)
-    CYAN = _ANSI_COLOR_CODE % (_LIGHT_CODE, 36)
-    WHITE = _ANSI_COLOR_CODE % (_LIGHT_CODE, 37)
+    # Matches every SGR sequence (including 256 colors and true colors), just like prettytable's _re.
+    _ANSI_REGEXP = re.compile('\x1b\\[[\\d;]*m')
+    _DARK_CODE = 0
+    _LIGHT_CODE = 1
+
+    NORMAL = Style(_DARK_CODE, 0)
+    DARK_RED = Style(_DARK_CODE, 31)
+    DARK_GREEN = Style(_DARK_CODE, 32)
+    DARK_YELLOW = Style(_DARK_CODE, 33)
+    DARK_BLUE = Style(_DARK_CODE, 34)
+    DARK_PURPLE = Style(_DARK_CODE, 35)
+    DARK_CYAN = Style(_DARK_CODE, 36)
+    GREY = Style(_DARK_CODE, 37)
+    RED = Style(_LIGHT_CODE, 31)
+    GREEN = Style(_LIGHT_CODE, 32)
+    YELLOW = Style(_LIGHT_CODE, 33)
+    BLUE = Style(_LIGHT_CODE, 34)
+    PURPLE = Style(_LIGHT_CODE, 35)
+    CYAN = Style(_LIGHT_CODE, 36)
+    WHITE = Style(_LIGHT_CODE, 37)
 
     _COLORS_LIST = ['dark_red', 'dark_green', 'dark_yellow', 'dark_blue', 'dark_purple', 'dark_cyan', 'grey', 'red',
                     'green', 'yellow', 'blue', 'purple', 'cyan', 'white']
 
-    _ANSI_COLOR_LENGTH = len(WHITE)
-
-    def __init__(self, writer, colors: bool = True, width_limit: bool = True):
+    def __init__(self, writer, colors: bool = True, width_limit: bool = True, raw: bool = False,
+                 disabled: bool = False):
         """
         Initializes the printer with the given writer.
 
         :param writer: The writer to use (for example - IPythonWriter, or DefaultWriter).
         :param colors: If False, no colors will be printed.
         :param width_limit: If True, printing width will be limited by console width.
+        :param raw: If True, text is printed without colors and width limiting, only with indentation.
+                    This is much faster, and fits outputs which are not terminals (like files and pipes).
+        :param disabled: If True, nothing will be printed (and no formatting will be done).
         """
         self._writer = writer
         self._in_line = False
         self._colors = colors
         self._width_limit = width_limit
+        self._raw = raw
+        self._disabled = disabled
         self._last_position = 0
         self._is_first_line = False
         self._indents = []
         self.indents_sum = 0
+        self._indent_prefix = ''
+
+    @classmethod
+    @contextmanager
+    def to_file(cls, output_file_path: str, colors: bool = False, width_limit: bool = False,
+                encoding: str = 'UTF-8', append: bool = False,
+                compression: Optional[str] = None) -> Iterator['Printer']:
+        """
+        Returns a context manager of a printer which writes to a file, using a buffered FileWriter
+        (or a CompressedWriter, if compression is requested).
+        The file is flushed and closed when the context exits.
+
+        :param output_file_path: The path of the file to write to.
+        :param colors: If False, no colors will be printed.
+        :param width_limit: If True, printing width will be limited by console width.
+        :param encoding: The encoding of the written text.
+        :param append: If True, the text will be appended to the file instead of overwriting it.
+        :param compression: One of 'gzip', 'bz2' or 'xz' to compress the file while writing it, or None.
+        :return: A context manager of the printer.
+        """
+        from pyprinter.writers import CompressedWriter, FileWriter
+
+        if compression is None:
+            writer = FileWriter(output_file_path, encoding=encoding, append=append)
+        else:
+            writer = CompressedWriter(output_file_path, compression=compression, encoding=encoding, append=append)
+        with writer:
+            # Without colors and width limiting there's nothing to format, so the raw path can be used.
+            yield cls(writer, colors=colors, width_limit=width_limit, raw=not colors and not width_limit)
 
     def group(self, indent: int = DEFAULT_INDENT, add_line: bool = True) -> _TextGroup:
         """
@@ -119,11 +244,13 @@ class Printer:
         """
         return _TextGroup(self, indent, add_line)
 
-    def _split_lines(self, original_lines: List[str]) -> List[str]:
+    @timed('Printer._split_lines')
+    def _split_lines(self, original_lines: List[str], soft_breaks: Optional[List[bool]] = None) -> List[str]:
         """
         Splits the original lines list according to the current console width and group indentations.
 
         :param original_lines: The original lines list to split.
+        :param soft_breaks: If given, whether each new line's break was added by the split will be appended to it.
         :return: A list of the new width-formatted lines.
         """
         console_width = get_console_width()
@@ -134,35 +261,43 @@ class Printer:
         lines = []
         for i, line in enumerate(original_lines):
             fixed_line = []
-            colors_counter = 0
+            colors_length = 0
             line_index = 0
+            # Whether this line was wrapped (so that a leftover of color codes belongs to its last part).
+            is_wrapped = False
             while line_index < len(line):
                 c = line[line_index]
 
                 # Check if we're in a color block.
-                if self._colors and c == self._ANSI_COLOR_PREFIX and \
-                        len(line) >= (line_index + self._ANSI_COLOR_LENGTH):
-                    current_color = line[line_index:line_index + self._ANSI_COLOR_LENGTH]
+                if self._colors and c == self._ANSI_COLOR_PREFIX:
+                    color_match = self._ANSI_REGEXP.match(line, line_index)
                     # If it really is a color, skip it.
-                    if self._ANSI_REGEXP.match(current_color):
-                        line_index += self._ANSI_COLOR_LENGTH
-                        fixed_line.extend(list(current_color))
-                        colors_counter += 1
+                    if color_match:
+                        current_color = color_match.group()
+                        line_index += len(current_color)
+                        fixed_line.extend(current_color)
+                        colors_length += len(current_color)
                         continue
                 fixed_line.append(line[line_index])
                 line_index += 1
 
                 # Create a new line, if max line is reached.
-                if len(fixed_line) >= max_line_length + (colors_counter * self._ANSI_COLOR_LENGTH):
+                if len(fixed_line) >= max_line_length + colors_length:
                     # Special case in which we want to split right before the line break.
                     if len(line) > line_index and line[line_index] == self.LINE_SEP:
                         continue
                     line_string = ''.join(fixed_line)
-                    if not line_string.endswith(self.LINE_SEP):
+                    is_soft_break = not line_string.endswith(self.LINE_SEP)
+                    if is_soft_break:
                         line_string += self.LINE_SEP
                     lines.append(line_string)
+                    if soft_breaks is not None:
+                        soft_breaks.append(is_soft_break)
+                    if _stats.enabled:
+                        _stats.count('lines_wrapped')
                     fixed_line = []
-                    colors_counter = 0
+                    colors_length = 0
+                    is_wrapped = True
                     self._last_position = 0
                     # Max line length has changed since the last position is now 0.
                     max_line_length = console_width - len(self.LINE_SEP) - self.indents_sum
@@ -170,14 +305,20 @@ class Printer:
 
             if len(fixed_line) > 0:
                 fixed_line = ''.join(fixed_line)
-                # If this line contains only color codes, attach it to the last line instead of creating a new one.
-                if len(fixed_line) == self._ANSI_COLOR_LENGTH and self._ANSI_REGEXP.match(fixed_line) is not None and \
-                        len(lines) > 0:
+                # If the wrapping left only color codes, attach them to the line's last part instead of creating
+                # a new line.
+                if is_wrapped and self._ANSI_REGEXP.match(fixed_line) is not None and \
+                        self._ANSI_REGEXP.sub('', fixed_line) in ('', self.LINE_SEP):
                     lines[-1] = lines[-1][:-1] + fixed_line
+                    if soft_breaks is not None:
+                        soft_breaks[-1] = False
                 else:
                     lines.append(fixed_line)
+                    if soft_breaks is not None:
+                        soft_breaks.append(False)
         return lines
 
+    @timed('Printer.write')
     def write(self, text: str):
         """
         Prints text to the screen.
@@ -186,27 +327,41 @@ class Printer:
 
         :param text: The text to print.
         """
+        if self._disabled:
+            return
+        if _stats.enabled:
+            _stats.count('color_codes', text.count(self._ANSI_COLOR_PREFIX))
+        if self._raw:
+            self._write_raw(text)
+            return
         # Default color is NORMAL.
-        last_color = (self._DARK_CODE, 0)
+        last_color = self.NORMAL
+        # Writers which support it get the formatted lines (with their soft breaks) in a single call.
+        write_formatted = getattr(self._writer, 'write_formatted', None)
+        formatted_lines = []
+        soft_breaks = [] if write_formatted is not None and self._width_limit else None
         # We use splitlines with keepends in order to keep the line breaks.
         # Then we split by using the console width.
         original_lines = text.splitlines(True)
-        lines = self._split_lines(original_lines) if self._width_limit else original_lines
+        lines = self._split_lines(original_lines, soft_breaks) if self._width_limit else original_lines
 
         # Print the new width-formatted lines.
-        for line in lines:
+        for i, line in enumerate(lines):
             # Print indents only at line beginnings.
-            if not self._in_line:
-                self._writer.write(' ' * self.indents_sum)
+            indent = '' if self._in_line else self._indent_prefix
             # Remove colors if needed.
             if not self._colors:
-                for color_code in self._ANSI_REGEXP.findall(line):
-                    line = line.replace(self._ANSI_COLOR_CODE % (color_code[0], int(color_code[1])), '')
+                line = self._ANSI_REGEXP.sub('', line)
             elif not self._ANSI_REGEXP.match(line):
                 # Check if the line starts with a color. If not, we apply the color from the last line.
-                line = self._ANSI_COLOR_CODE % (last_color[0], int(last_color[1])) + line
+                line = last_color + line
             # Print the final line.
-            self._writer.write(line)
+            if write_formatted is not None:
+                formatted_lines.append(FormattedLine(indent, line, soft_breaks is not None and soft_breaks[i]))
+            else:
+                if indent:
+                    self._writer.write(indent)
+                self._writer.write(line)
             # Update the in_line status.
             self._in_line = not line.endswith(self.LINE_SEP)
             # Update the last color used.
@@ -219,8 +374,7 @@ class Printer:
             if not last_line.endswith(self.LINE_SEP):
                 # Strip the colors to figure out the real number of characters in the line.
                 if self._colors:
-                    for color_code in self._ANSI_REGEXP.findall(last_line):
-                        last_line = last_line.replace(self._ANSI_COLOR_CODE % (color_code[0], int(color_code[1])), '')
+                    last_line = self._ANSI_REGEXP.sub('', last_line)
                 self._last_position += len(last_line)
             else:
                 self._last_position = 0
@@ -230,7 +384,30 @@ class Printer:
 
         # Reset colors for the next print.
         if self._colors and not text.endswith(self.NORMAL):
-            self._writer.write(self.NORMAL)
+            if write_formatted is not None:
+                formatted_lines.append(FormattedLine('', self.NORMAL, False))
+            else:
+                self._writer.write(self.NORMAL)
+        if formatted_lines:
+            write_formatted(formatted_lines)
+
+    def _write_raw(self, text: str):
+        """
+        Prints text as is, stripping its colors and adding the indentation at line beginnings.
+
+        :param text: The text to print.
+        """
+        if self._ANSI_COLOR_PREFIX in text:
+            text = self._ANSI_REGEXP.sub('', text)
+        if not text:
+            return
+        if self._indent_prefix:
+            lines = text.splitlines(True)
+            # Only the first line might be a continuation of the current line.
+            first_prefix = '' if self._in_line else self._indent_prefix
+            text = first_prefix + self._indent_prefix.join(lines)
+        self._in_line = not text.endswith(self.LINE_SEP)
+        self._writer.write(text)
 
     def write_line(self, text: str = ''):
         """
@@ -259,6 +436,8 @@ class Printer:
         :param dark_value_color: The values text color for unimportant values (default is dark green).
         :param separator: The separator to use (default is ':').
         """
+        if self._disabled:
+            return
         align_size = align_size or min(32, get_console_width() // 2)
         not_important_keys = not_important_keys or []
         if value is None:
@@ -280,6 +459,198 @@ class Printer:
             elif not is_list:
                 self.write_line(value_color + str(value))
 
+    def write_aligned_many(self, items: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+                           not_important_keys: Optional[List[str]] = None, is_list: bool = False,
+                           align_size: Optional[int] = None, key_color: str = PURPLE, value_color: str = GREEN,
+                           dark_key_color: str = DARK_PURPLE, dark_value_color: str = DARK_GREEN,
+                           separator: str = SEPARATOR):
+        """
+        Prints a block of keys and values aligned to align_size (like calling write_aligned for each of them).
+        The alignment is computed once, and the whole block is laid out in one pass and printed in one write.
+
+        :param items: A dictionary (or an iterable of key and value pairs) of the properties to print.
+        :param not_important_keys: Properties that will be printed in a darker color.
+        :param is_list: True if the values are lists of items.
+        :param align_size: The alignment size to use.
+        :param key_color: The key text color (default is purple).
+        :param value_color: The value text color (default is green).
+        :param dark_key_color: The key text color for unimportant keys (default is dark purple).
+        :param dark_value_color: The values text color for unimportant values (default is dark green).
+        :param separator: The separator to use (default is ':').
+        """
+        if self._disabled:
+            return
+        if isinstance(items, dict):
+            items = items.items()
+        align_size = align_size or min(32, get_console_width() // 2)
+        # The block can only be laid out by itself at the beginning of a line.
+        if self._in_line:
+            for key, value in items:
+                self.write_aligned(key, value, not_important_keys=not_important_keys, is_list=is_list,
+                                   align_size=align_size, key_color=key_color, value_color=value_color,
+                                   dark_key_color=dark_key_color, dark_value_color=dark_value_color,
+                                   separator=separator)
+            return
+        not_important_keys = not_important_keys or []
+        indent = ' ' * self.indents_sum
+        values_indent = indent + ' ' * align_size
+        # Writers which support it get the formatted lines (with their soft breaks), like in write().
+        write_formatted = None if self._raw else getattr(self._writer, 'write_formatted', None)
+        # The block lines, as (indent, text, soft break) tuples.
+        block = []
+        with self.group(indent=align_size, add_line=False):
+            for key, value in items:
+                if value is None:
+                    continue
+                if isinstance(value, bool):
+                    value = str(value)
+                if key in not_important_keys:
+                    current_key_color, current_value_color = dark_key_color, dark_value_color
+                else:
+                    current_key_color, current_value_color = key_color, value_color
+                values = value if is_list else [str(value)]
+                key_prefix = f'{indent}{current_key_color}{key}{separator}{self.NORMAL}' + \
+                    ' ' * (align_size - len(key) - 1)
+                if len(values) == 0:
+                    block.append((indent, key_prefix[len(indent):] + self.LINE_SEP, False))
+                    continue
+                lines = [current_value_color + v + self.LINE_SEP for v in values]
+                soft_breaks = []
+                if self._width_limit and not self._raw:
+                    lines = self._split_lines(lines, soft_breaks)
+                last_color = current_value_color
+                for i, line in enumerate(lines):
+                    if not self._ANSI_REGEXP.match(line):
+                        line = last_color + line
+                    soft_break = bool(soft_breaks) and soft_breaks[i]
+                    if i == 0:
+                        block.append((indent, key_prefix[len(indent):] + line, soft_break))
+                    else:
+                        block.append((values_indent, line, soft_break))
+                    for color_match in self._ANSI_REGEXP.finditer(line):
+                        last_color = color_match.group(0)
+        if not block:
+            return
+        strip_colors = not self._colors or self._raw
+        if write_formatted is not None:
+            formatted_lines = [FormattedLine(line_indent, self._ANSI_REGEXP.sub('', text) if strip_colors else text,
+                                             soft_break) for line_indent, text, soft_break in block]
+            if not strip_colors:
+                formatted_lines.append(FormattedLine('', self.NORMAL, False))
+            write_formatted(formatted_lines)
+        else:
+            block_text = ''.join(line_indent + text for line_indent, text, _ in block) + self.NORMAL
+            if strip_colors:
+                block_text = self._ANSI_REGEXP.sub('', block_text)
+            self._writer.write(block_text)
+        self._in_line = False
+        self._last_position = 0
+        self._is_first_line = False
+
+    # The brackets of the containers write_object can open (anything else is printed by its repr).
+    _OBJECT_BRACKETS = ((Mapping, '{', '}'), (list, '[', ']'), (tuple, '(', ')'), (set, '{', '}'),
+                        (frozenset, 'frozenset({', '})'), (IteratorABC, '[', ']'))
+
+    def write_object(self, obj: Any, max_depth: Optional[int] = None, max_items: Optional[int] = None,
+                     max_string: Optional[int] = None, key_color: str = PURPLE, value_color: str = GREEN,
+                     indent: int = DEFAULT_INDENT):
+        """
+        Prints a nested object (dictionaries, lists, tuples, sets and iterators), one item per line.
+        The object is walked iteratively and printed while walking, so big objects are never formatted into one
+        string, and truncated containers (and iterators) are only consumed up to max_items.
+        Objects which contain themselves are printed as a recursion marker (like pprint does).
+
+        :param obj: The object to print.
+        :param max_depth: The maximal nesting level to print (deeper containers are printed as '...'), or None.
+        :param max_items: The maximal number of items to print for every container, or None.
+        :param max_string: The maximal length of printed values (strings and other representations), or None.
+        :param key_color: The dictionary keys text color (default is purple).
+        :param value_color: The values text color (default is green).
+        :param indent: Number of spaces to indent every nesting level with.
+        """
+        if self._disabled:
+            return
+        # Every frame is an opened container: (items iterator, remaining items iterator, the container, closing).
+        frames = []
+        # The ids of the containers being printed, for detecting recursion.
+        path_ids = set()
+
+        def open_value(prefix: str, value: Any, suffix: str):
+            brackets = self._get_object_brackets(value)
+            if brackets is None:
+                self.write_line(prefix + value_color + self._format_object_value(value, max_string) + suffix)
+                return
+            opening, closing = brackets
+            if id(value) in path_ids:
+                self.write_line(f'{prefix}{value_color}<Recursion on {type(value).__name__} with id={id(value)}>'
+                                f'{suffix}')
+            elif not isinstance(value, IteratorABC) and len(value) == 0:
+                self.write_line(prefix + value_color + (repr(value) if isinstance(value, (set, frozenset)) else
+                                                        opening + closing) + suffix)
+            elif max_depth is not None and len(frames) >= max_depth:
+                self.write_line(f'{prefix}{value_color}{opening}...{closing}{suffix}')
+            else:
+                self.write_line(prefix + opening)
+                group = self.group(indent=indent, add_line=False)
+                group.__enter__()
+                path_ids.add(id(value))
+                items = iter(value.items() if isinstance(value, Mapping) else value)
+                frames.append((islice(items, max_items), items, value, closing + suffix, group))
+
+        try:
+            open_value('', obj, '')
+            while frames:
+                limited_items, items, container, closing, group = frames[-1]
+                item = next(limited_items, StopIteration)
+                if item is not StopIteration:
+                    if isinstance(container, Mapping):
+                        key, value = item
+                        open_value(key_color + repr(key) + self.NORMAL + ': ', value, ',')
+                    else:
+                        open_value('', item, ',')
+                    continue
+                # The container is done, or truncated (which is checked by peeking at one more item).
+                if max_items is not None and next(items, StopIteration) is not StopIteration:
+                    if isinstance(container, IteratorABC):
+                        self.write_line(self.GREY + '...')
+                    else:
+                        self.write_line(self.GREY + f'... ({len(container) - max_items} more)')
+                frames.pop()
+                path_ids.discard(id(container))
+                group.__exit__(None, None, None)
+                self.write_line(closing)
+        finally:
+            # Close the groups of an interrupted walk.
+            for _, _, _, _, group in reversed(frames):
+                group.__exit__(None, None, None)
+
+    @classmethod
+    def _get_object_brackets(cls, value: Any) -> Optional[Tuple[str, str]]:
+        """
+        Returns the opening and closing brackets of a container write_object walks into, or None.
+        """
+        if isinstance(value, (str, bytes, bytearray)):
+            return None
+        for container_type, opening, closing in cls._OBJECT_BRACKETS:
+            if isinstance(value, container_type):
+                return opening, closing
+        return None
+
+    @staticmethod
+    def _format_object_value(value: Any, max_string: Optional[int]) -> str:
+        """
+        Returns the (possibly truncated) representation of a single value.
+        """
+        if max_string is None:
+            return repr(value)
+        if isinstance(value, (str, bytes)) and len(value) > max_string:
+            # Cut before formatting, so that huge strings aren't copied by repr.
+            return repr(value[:max_string]) + '...'
+        representation = repr(value)
+        if len(representation) > max_string:
+            return representation[:max_string] + '...'
+        return representation
+
     def write_title(self, title: str, title_color: str = YELLOW, hyphen_line_color: str = WHITE):
         """
         Prints title with hyphen line underneath it.
@@ -291,23 +662,33 @@ class Printer:
         self.write_line(title_color + title)
         self.write_line(hyphen_line_color + '=' * (len(title) + 3))
 
-    def __getattr__(self, item: str):
-        # Support color function in a generic fashion.
-        if item in self._COLORS_LIST:
-            def wrapper(text):
-                # Color function content will be wrapped, and the rest of the text color will be normal.
-                wrapped_text = getattr(self, item.upper()) + text
-                # No need to duplicate normal color suffix.
-                if not wrapped_text.endswith(self.NORMAL):
-                    wrapped_text += self.NORMAL
-                return wrapped_text
 
-            return wrapper
+def _color_function(color: Style):
+    """
+    Returns a Printer color method (i.e. printer.yellow), which wraps the text with the given color.
+    """
+    def color_function(self: Printer, text: str) -> str:
+        """
+        Returns the given text colored, followed by the normal color.
+        """
+        return color(text)
+
+    return color_function
+
 
-        return super().__getattribute__(item)
+# Bind the color functions once, so they won't be looked up or created on every call.
+for _color_name in Printer._COLORS_LIST:
+    setattr(Printer, _color_name, _color_function(getattr(Printer, _color_name.upper())))
 
 
-_printer = None
+# The printers cache of the default writer, by their configuration (colors, width limit, disabled and raw).
+_printers = {}
+# The printers of given writers, by the writer and configuration. They are kept only while they are in use,
+# so that the cache won't keep writers (and their open files) alive.
+_writer_printers = weakref.WeakValueDictionary()
+_printers_lock = threading.Lock()
+# The default writer for printers which were not given a writer (None means a new DefaultWriter).
+_default_writer = None
 # Colors won't work on Linux if TERM is not defined.
 _colors = os.name == 'nt' or os.getenv('TERM')
 
@@ -319,28 +700,59 @@ if os.name == 'nt' and sys.stdout == sys.__stdout__:
         try:
             from pyreadline.console.console import Console
 
-            _printer = Printer(Console())
+            _default_writer = Console()
         except ImportError:
             # If all failed, just print without colors.
             _colors = False
 
 
-def get_printer(colors: bool = True, width_limit: bool = True, disabled: bool = False) -> Printer:
+def get_printer(colors: bool = True, width_limit: bool = True, disabled: bool = False,
+                raw: Optional[bool] = None, writer=None) -> Printer:
     """
     Returns an already initialized instance of the printer.
+    There's a single instance for each configuration, so its state (like open groups) is kept between calls.
+    Printers of a given writer are kept only as long as they are referenced elsewhere.
 
     :param colors: If False, no colors will be printed.
     :param width_limit: If True, printing width will be limited by console width.
     :param disabled: If True, nothing will be printed.
+    :param raw: If True, text is printed without colors and width limiting (which is much faster).
+                If None, raw printing is used only when the output is not a terminal (like a file or a pipe).
+    :param writer: The writer to use (default is a DefaultWriter).
     """
-    global _printer
-    global _colors
     # Make sure we can print colors if needed.
-    colors = colors and _colors
-    # If the printer was never defined before, or the settings have changed.
-    if not _printer or (colors != _printer._colors) or (width_limit != _printer._width_limit):
-        _printer = Printer(DefaultWriter(disabled=disabled), colors=colors, width_limit=width_limit)
-    return _printer
+    colors = bool(colors and _colors)
+    if raw is None:
+        raw = not _is_terminal(writer or _default_writer or sys.stdout)
+    if writer is None:
+        printers, key = _printers, (colors, width_limit, disabled, raw)
+    else:
+        printers, key = _writer_printers, (writer, colors, width_limit, disabled, raw)
+    printer = printers.get(key)
+    if printer is None:
+        with _printers_lock:
+            printer = printers.get(key)
+            if printer is None:
+                printer_writer = writer or (_default_writer if _default_writer and not disabled else
+                                            DefaultWriter(disabled=disabled))
+                printer = printers[key] = Printer(printer_writer, colors=colors, width_limit=width_limit, raw=raw,
+                                                  disabled=disabled)
+    return printer
+
+
+def _is_terminal(writer) -> bool:
+    """
+    A small utility function which determines if the given writer prints to a terminal.
+    Writers which can't tell are considered terminals, and so are IPython's QTConsole and notebooks (which render
+    colors although they aren't TTYs).
+    """
+    global _IN_QT
+    if _IN_QT is None:
+        _IN_QT = _in_qtconsole()
+    if _IN_QT:
+        return True
+    isatty = getattr(writer, 'isatty', None)
+    return isatty is None or bool(isatty())
 
 
 def _get_windows_console_width() -> int:
@@ -382,6 +794,7 @@ def _in_qtconsole() -> bool:
         return False
 
 
+@timed('get_console_width')
 def get_console_width() -> int:
     """
     A small utility function for getting the current console window's width.
@@ -391,6 +804,8 @@ def get_console_width() -> int:
     # Assigning the value once, as frequent call to this function
     # causes a major slow down(ImportErrors + isinstance).
     global _IN_QT
+    if _stats.enabled:
+        _stats.count('console_width_lookups')
     if _IN_QT is None:
         _IN_QT = _in_qtconsole()
 
@@ -408,4 +823,4 @@ def get_console_width() -> int:
         return 80
 
 
-__all__ = ['get_printer', 'get_console_width', 'Printer', 'DefaultWriter']
+__all__ = ['get_printer', 'get_console_width', 'Printer', 'DefaultWriter', 'Style', 'FormattedLine']
@@ -0,0 +1,267 @@
+import cProfile
+from collections import Counter
+import functools
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from pyprinter.printer import get_printer, Printer
+from pyprinter.progress_bar import Bar
+from pyprinter.table import Table
+
+"""
+Profiles a block of code, and prints the functions which took the most time as a table.
+
+Two modes are supported:
+- 'cprofile' (the default) uses the cProfile module, and counts every call.
+- 'sampling' samples the call stack on a CPU timer signal, which costs much less on code with many small calls.
+  Times are estimated from the process CPU time, and call counts are not available in this mode.
+  It can only be used on the main thread (and not on Windows).
+
+A profiler can be entered several times (i.e. a decorated function which is called many times), and its results
+accumulate.
+
+Example:
+    import pyprinter
+
+    with pyprinter.profile(top=10):
+        do_something()
+
+    # Or as a decorator.
+    @pyprinter.profile(mode='sampling')
+    def do_something_else():
+        ...
+"""
+
+_THIS_FILE = os.path.normcase(os.path.abspath(__file__))
+
+
+class FunctionStats(NamedTuple):
+    """
+    The profiling results of a single function (times are in seconds).
+    """
+    name: str
+    calls: Optional[int]
+    self_time: float
+    cumulative_time: float
+
+
+class Profile:
+    """
+    A context manager (and decorator) which profiles the code it wraps, and prints a report when it exits.
+    """
+
+    CPROFILE = 'cprofile'
+    SAMPLING = 'sampling'
+    SORT_KEYS = ('cumulative', 'self', 'calls')
+    DEFAULT_INTERVAL = 0.001
+
+    _COLUMNS = ('Function', 'Calls', 'Self Time', 'Cumulative Time', 'Cumulative %')
+    _BAR_WIDTH = 20
+
+    def __init__(self, top: int = 20, sort_by: str = 'cumulative', mode: str = CPROFILE,
+                 interval: float = DEFAULT_INTERVAL, title: str = 'Profile', printer: Optional[Printer] = None,
+                 print_report: bool = True):
+        """
+        Initializes the profiler.
+
+        :param top: The number of functions to show in the report.
+        :param sort_by: The report order - 'cumulative' (time), 'self' (time) or 'calls'.
+        :param mode: Profile.CPROFILE or Profile.SAMPLING.
+        :param interval: The number of seconds between samples (only used in sampling mode).
+        :param title: The title of the report table.
+        :param printer: The printer to print the report with (default is the default printer).
+        :param print_report: If True, the report will be printed when the profiling ends.
+        """
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(f'Unknown sort key {sort_by!r} (use one of: {", ".join(self.SORT_KEYS)})')
+        if mode not in (self.CPROFILE, self.SAMPLING):
+            raise ValueError(f'Unknown profiling mode {mode!r}!')
+        if mode == self.SAMPLING and not hasattr(signal, 'setitimer'):
+            raise ValueError('Sampling mode is not supported on this platform!')
+        self.top = top
+        self.sort_by = sort_by
+        self.mode = mode
+        self.interval = interval
+        self.title = title
+        self.printer = printer
+        self.print_report = print_report
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self._profiler = None
+        # The number of active entries (recursive calls of a decorated function re-enter the profiler).
+        self._depth = 0
+        self._start_time = None
+        self._start_cpu_time = None
+        # Sampling mode state.
+        self._entry_frame = None
+        self._previous_handler = None
+        self._self_samples = Counter()
+        self._cumulative_samples = Counter()
+
+    def __enter__(self) -> 'Profile':
+        self._depth += 1
+        if self._depth > 1:
+            # Already profiling.
+            return self
+        self._start_time = time.perf_counter()
+        self._start_cpu_time = time.process_time()
+        if self.mode == self.SAMPLING:
+            if threading.current_thread() is not threading.main_thread():
+                self._depth -= 1
+                raise ValueError('Sampling mode can only be used on the main thread!')
+            # Only the frames called from here are sampled.
+            self._entry_frame = sys._getframe(1)
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            if self._profiler is None:
+                self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        if self.mode == self.SAMPLING:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+        else:
+            self._profiler.disable()
+        self.wall_time += time.perf_counter() - self._start_time
+        self.cpu_time += time.process_time() - self._start_cpu_time
+        if self.print_report:
+            self.pretty_print()
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def _sample(self, signal_number, frame):
+        """
+        The timer signal handler - counts the functions on the sampled stack.
+        """
+        seen = set()
+        is_top = True
+        while frame is not None and frame is not self._entry_frame:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            if is_top:
+                self._self_samples[key] += 1
+                is_top = False
+            # Recursive functions are counted once per sample.
+            if key not in seen:
+                seen.add(key)
+                self._cumulative_samples[key] += 1
+            frame = frame.f_back
+
+    @staticmethod
+    def _format_function(key: Tuple[str, int, str]) -> str:
+        file_name, line_number, function_name = key
+        # Built-in functions don't have a file.
+        if file_name == '~' and line_number == 0:
+            return function_name
+        return f'{function_name} ({os.path.basename(file_name)}:{line_number})'
+
+    def get_stats(self) -> List[FunctionStats]:
+        """
+        Returns the profiling results of all the profiled functions, in the report order.
+        """
+        results = []
+        if self.mode == self.SAMPLING:
+            # Signals are delivered late (and may be merged), so the CPU time is spread over the taken samples.
+            total_samples = sum(self._self_samples.values())
+            sample_time = self.cpu_time / total_samples if total_samples else self.interval
+            for key, cumulative_samples in self._cumulative_samples.items():
+                results.append(FunctionStats(self._format_function(key), None, self._self_samples[key] * sample_time,
+                                             cumulative_samples * sample_time))
+        elif self._profiler is not None:
+            for key, (_, calls, self_time, cumulative_time, _) in pstats.Stats(self._profiler).stats.items():
+                # Don't report the profiler itself.
+                if os.path.normcase(os.path.abspath(key[0])) == _THIS_FILE or '_lsprof.Profiler' in key[2]:
+                    continue
+                results.append(FunctionStats(self._format_function(key), calls, self_time, cumulative_time))
+        if self.sort_by == 'self':
+            results.sort(key=lambda stats: stats.self_time, reverse=True)
+        elif self.sort_by == 'calls':
+            results.sort(key=lambda stats: stats.calls or 0, reverse=True)
+        else:
+            results.sort(key=lambda stats: stats.cumulative_time, reverse=True)
+        return results
+
+    def get_table(self, colors: bool = False) -> Table:
+        """
+        Returns the report of the top functions as a table.
+
+        :param colors: If True, the percentage bars will be colored by how much time they took.
+        """
+        results = self.get_stats()
+        total_time = sum(stats.self_time for stats in results)
+        # The bar meter works with integers, so use microseconds.
+        bar = Bar(max(1, round(total_time * 1000000)), width=self._BAR_WIDTH)
+        data = []
+        for stats in results[:self.top]:
+            ratio = stats.cumulative_time / total_time if total_time else 0
+            percentage = f'{ratio * 100:5.1f}% ' + bar.eval(round(stats.cumulative_time * 1000000))
+            if colors:
+                color = Printer.RED if ratio >= 0.5 else Printer.YELLOW if ratio >= 0.2 else Printer.GREEN
+                percentage = color + percentage + Printer.NORMAL
+            data.append(dict(zip(self._COLUMNS, (stats.name, '-' if stats.calls is None else str(stats.calls),
+                                                 f'{stats.self_time:.6f}', f'{stats.cumulative_time:.6f}',
+                                                 percentage))))
+        return Table(self.title, data, column_size_map={'Function': 60}, headers_color=Printer.CYAN)
+
+    def pretty_print(self, printer: Optional[Printer] = None):
+        """
+        Prints the profiling report.
+
+        :param printer: The printer to print with (default is the profiler's printer).
+        """
+        printer = printer or self.printer or get_printer()
+        table = self.get_table(colors=True)
+        if not table.data:
+            printer.write_line(printer.YELLOW + f'{self.title}: nothing was profiled.')
+            return
+        table.pretty_print(printer, align=Table.ALIGN_LEFT)
+        printer.write_line(printer.GREY + f'Total wall time: {self.wall_time:.6f} seconds')
+
+    def get_as_csv(self, output_file_path: Optional[str] = None) -> str:
+        """
+        Returns the profiling report as a CSV string.
+
+        :param output_file_path: The output file to save the CSV to, or None.
+        :return: CSV representation of the report.
+        """
+        return self.get_table().get_as_csv(output_file_path)
+
+    def get_as_html(self) -> str:
+        """
+        Returns the profiling report as an HTML string.
+        """
+        return self.get_table().get_as_html()
+
+
+def profile(func: Optional[Callable] = None, **kwargs) -> Union[Profile, Callable]:
+    """
+    Returns a profiler, which can be used as a context manager or as a decorator.
+    Can also be used as a decorator without parentheses (i.e. @profile).
+
+    :param func: The function to profile, when used as a decorator without parentheses.
+    :param kwargs: The Profile parameters (top, sort_by, mode, interval, title, printer and print_report).
+    :return: The profiler (or the decorated function).
+    """
+    if func is not None:
+        return Profile(**kwargs)(func)
+    return Profile(**kwargs)
+
+
+__all__ = ['profile', 'Profile', 'FunctionStats']
@@ -1,8 +1,13 @@
+import asyncio
+import os
+import stat
 import sys
 import time
-from typing import List, Optional
+from typing import Any, AsyncIterator, Awaitable, Iterable, Iterator, List, Optional, Tuple
 
 from pyprinter import get_console_width
+from pyprinter.file_size import FileSize
+from pyprinter.instrumentation import timed
 
 """
 Code taken from the "progressbar" and "progressbar33" packages.
@@ -120,18 +125,100 @@ class Animated:
         return self.frames[pos]
 
 
+class _MovingRate:
+    """
+    An exponentially weighted moving average of the progress rate (units per second).
+    Recent updates weigh more than old ones, so the rate follows throughput changes.
+    """
+
+    # Updates closer than that (in seconds) are merged, so that the rate isn't distorted by timer resolution.
+    _MIN_INTERVAL = 0.1
+
+    def __init__(self, smoothing: float):
+        """
+        :param smoothing: The weight of the newest update (between 0 and 1, higher means a more jumpy rate).
+        """
+        if not 0 < smoothing <= 1:
+            raise ValueError('Smoothing must be between 0 and 1!')
+        self.smoothing = smoothing
+        self.rate = None
+        self._last_time = None
+        self._last_current = None
+
+    def update(self, current: Optional[int]) -> Optional[float]:
+        """
+        Updates the rate with the current progress, and returns it (or None if it's still unknown).
+        """
+        if current is None:
+            return self.rate
+        now = time.monotonic()
+        if self._last_time is not None:
+            elapsed = now - self._last_time
+            if elapsed < self._MIN_INTERVAL:
+                return self.rate
+            current_rate = (current - self._last_current) / elapsed
+            if self.rate is None:
+                self.rate = current_rate
+            else:
+                self.rate = self.smoothing * current_rate + (1 - self.smoothing) * self.rate
+        self._last_time = now
+        self._last_current = current
+        return self.rate
+
+
+class Rate:
+    """
+    Rate (how many units are done per second), smoothed with an exponentially weighted moving average.
+    Byte rates are formatted like file sizes.
+    """
+
+    DEFAULT_SMOOTHING = 0.3
+
+    def __init__(self, total: Optional[int] = None, smoothing: float = DEFAULT_SMOOTHING, unit: str = 'it',
+                 track_bytes: bool = False):
+        """
+        :param total: The total amount of units (not used, for compatibility with the other meters).
+        :param smoothing: The weight of the newest update (between 0 and 1, higher means a more jumpy rate).
+        :param unit: The name of the unit (used when not tracking bytes).
+        :param track_bytes: If True, the units are bytes, and the rate is formatted like a file size.
+        """
+        self.total = total
+        self.unit = unit
+        self.track_bytes = track_bytes
+        self._moving_rate = _MovingRate(smoothing)
+
+    @property
+    def width(self) -> int:
+        """
+        The length of the meter string.
+        """
+        return 11 if self.track_bytes else 12 + len(self.unit)
+
+    def eval(self, current: Optional[int]) -> str:
+        rate = self._moving_rate.update(current)
+        if self.track_bytes:
+            rate_str = str(FileSize(rate)) if rate is not None else '?'
+            return f'{rate_str:>9s}/s'
+        rate_str = f'{rate:.1f}' if rate is not None else '?'
+        return f'{rate_str:>9s} {self.unit}/s'
+
+
 class Timing:
     """
     Timing (how much time has elapsed, how much is left).
     Find the time elapsed since its creation, calculate the average time for
     each "unit", then predict the time left.
+    If smoothing is given, the time left is predicted from a moving average of the recent rate instead
+    (which follows throughput changes much better than the overall average).
     """
 
     _DEFAULT_FORMAT = 'elapsed: {0:>5s} left: {1:>5s}'
 
-    def __init__(self, total: Optional[int] = None, print_format: str = _DEFAULT_FORMAT):
+    def __init__(self, total: Optional[int] = None, print_format: str = _DEFAULT_FORMAT,
+                 smoothing: Optional[float] = None):
         self.total = total
         self.print_format = print_format
+        self._moving_rate = _MovingRate(smoothing) if smoothing is not None else None
 
         # time.strftime output format.
         # Starts with minutes and seconds.
@@ -147,7 +234,11 @@ class Timing:
         else:
             elapsed = time.monotonic() - self.start_time
 
-        time_per_unit = elapsed / current if current is not None and current > 0 else None
+        if self._moving_rate is not None:
+            rate = self._moving_rate.update(current)
+            time_per_unit = 1 / rate if rate else None
+        else:
+            time_per_unit = elapsed / current if current is not None and current > 0 else None
 
         if self.total is not None and time_per_unit is not None:
             remaining = time_per_unit * (self.total - current)
@@ -189,6 +280,57 @@ class Composite:
         return self.print_format.format(*(res_list + [message]))
 
 
+def _cursor_move(position: int, target: int) -> str:
+    """
+    Returns the shortest escape sequence which moves the cursor from position to target (in the same line).
+    """
+    if target == position:
+        return ''
+    if target > position:
+        relative = f'\x1b[{target - position}C'
+    else:
+        relative = f'\x1b[{position - target}D'
+    from_start = '\r' + (f'\x1b[{target}C' if target > 0 else '')
+    return relative if len(relative) <= len(from_start) else from_start
+
+
+def _get_redraw(previous_frame: Optional[str], frame: str, cursor: int) -> Tuple[str, int]:
+    """
+    Returns the text which turns the previously drawn frame into the new one, and the new cursor position.
+    Only the changed segments are rewritten (after moving the cursor to them), unless the frame length changed.
+
+    :param previous_frame: The currently drawn frame, or None if nothing was drawn.
+    :param frame: The frame to draw.
+    :param cursor: The current cursor position in the line.
+    :return: The text to write, and the cursor position after writing it.
+    """
+    if previous_frame is None or len(previous_frame) != len(frame):
+        # Full redraw, overwriting the leftovers of a longer previous frame.
+        padding = ' ' * max(0, len(previous_frame or '') - len(frame))
+        return '\r' + frame + padding, len(frame) + len(padding)
+
+    if frame == previous_frame:
+        return '', cursor
+    parts = []
+    segment_start = None
+    segment_end = None
+    for i, (previous_char, char) in enumerate(zip(previous_frame, frame)):
+        if previous_char == char:
+            continue
+        if segment_start is not None and len(_cursor_move(segment_end, i)) < i - segment_end:
+            # The gap is longer than the escape sequence which skips it, so close the current segment.
+            parts.append(_cursor_move(cursor, segment_start) + frame[segment_start:segment_end])
+            cursor = segment_end
+            segment_start = None
+        if segment_start is None:
+            segment_start = i
+        segment_end = i + 1
+    if segment_start is not None:
+        parts.append(_cursor_move(cursor, segment_start) + frame[segment_start:segment_end])
+        cursor = segment_end
+    return ''.join(parts), cursor
+
+
 class ProgressBar(Composite):
     """
     The default progress bar.
@@ -198,13 +340,17 @@ class ProgressBar(Composite):
     _METERS_LEN = 55
     # No printing will be done in the safe margin, to avoid accidental new lines.
     _SAFE_MARGIN = 5
+    # Differential redraws are replaced by a full redraw at least this often (in seconds), which recovers from
+    # anything else written to the terminal. The console width is checked again at the same time.
+    _FULL_REDRAW_INTERVAL = 1.0
 
     # Time constants.
     _FIRST_MESSAGE_TIME = 60
     _SECOND_MESSAGE_TIME = 120
     _THIRD_MESSAGE_TIME = 180
 
-    def __init__(self, total=None, verbose=True, show_default_message=True, is_lying=False, n_per_cycle=None):
+    def __init__(self, total=None, verbose=True, show_default_message=True, is_lying=False, n_per_cycle=None,
+                 differential=None, rate=False, smoothing=None, track_bytes=False):
         """
         Initializes the progress bar.
 
@@ -213,22 +359,43 @@ class ProgressBar(Composite):
         :param show_default_message: If True, a default message will be shown next to the progress bar.
         :param is_lying: If True, this is a lying progress bar and you shouldn't believe it!
         :param n_per_cycle: The number of eval calls it takes to switch animation frame.
+        :param differential: If True, only the changed parts of the progress bar are redrawn (using cursor movement
+                             escape sequences), which saves most of the output bytes.
+                             Default is True when the output is a terminal (except on Windows).
+        :param rate: If True, the rate (units per second) will be shown.
+        :param smoothing: If given, the rate and the time left are computed from a moving average of the recent
+                          progress, with this weight for the newest update (between 0 and 1).
+                          Otherwise, the time left is computed from the overall average.
+        :param track_bytes: If True, the units are bytes and the rate is formatted like a file size.
         """
         self._is_lying = is_lying
+        if differential is None:
+            differential = os.name != 'nt' and getattr(sys.stdout, 'isatty', lambda: False)()
+        self._differential = differential
+        # The currently drawn frame, the cursor position in it and the time of the last full redraw.
+        self._last_frame = None
+        self._cursor = 0
+        self._last_full_redraw = None
         self._verbose = verbose
         self._show_default_message = show_default_message
         self.current = None
         self.total = total
-        self._width = get_console_width() - self._METERS_LEN
+        self._console_width = get_console_width()
+        self._width = self._console_width - self._METERS_LEN
         self._start_time = None
 
         if total is not None and total > 0:
             meters = [Bar(total), Percentage(total)]
         else:
             meters = [Animated(n_per_cycle=n_per_cycle)]
-        meters.append(Timing(total))
+        if rate:
+            rate_meter = Rate(total, smoothing=smoothing or Rate.DEFAULT_SMOOTHING, track_bytes=track_bytes)
+            self._width -= rate_meter.width + 1
+            meters.append(rate_meter)
+        meters.append(Timing(total, smoothing=smoothing))
         super().__init__(meters)
 
+    @timed('ProgressBar.eval')
     def eval(self, current: Optional[int] = None, message: str = ''):
         if self.total and current is None:
             raise ValueError('Must supply a value for eval!')
@@ -256,22 +423,62 @@ class ProgressBar(Composite):
             elif current_time > self._FIRST_MESSAGE_TIME:
                 message = ' (Still here?)'
 
+        if self._verbose and self._differential:
+            self._check_full_redraw()
         # Format message to fit console width (and add whitespaces to overwrite previous message).
         message = message[:self._width] + ' ' * max(0, self._width - len(message) - self._SAFE_MARGIN)
         # Print the result.
         result = super(ProgressBar, self).eval(current, message)
         if self._verbose:
-            print(f'\r{result}', end='')
+            self._draw(result)
+
+    def _check_full_redraw(self):
+        """
+        Makes the next frame a full redraw, if the last one was too long ago (and adapts to console width changes).
+        """
+        now = time.monotonic()
+        if self._last_full_redraw is None:
+            # The first frame is always a full redraw.
+            self._last_full_redraw = now
+            return
+        if now - self._last_full_redraw < self._FULL_REDRAW_INTERVAL:
+            return
+        self._last_full_redraw = now
+        console_width = get_console_width()
+        if console_width != self._console_width:
+            self._width += console_width - self._console_width
+            self._console_width = console_width
+        self._last_frame = None
+
+    def _draw(self, frame: str):
+        """
+        Draws the frame over the previous one.
+        """
+        if self._differential:
+            text, self._cursor = _get_redraw(self._last_frame, frame, self._cursor)
+            self._last_frame = frame
+        else:
+            text = f'\r{frame}'
+        if text:
+            sys.stdout.write(text)
             sys.stdout.flush()
 
-    def finish(self):
+    def finish(self, complete: bool = True):
+        """
+        Finishes the progress bar line.
+
+        :param complete: If True, the progress bar is brought to 100% first.
+        """
         if self._verbose:
-            if self.total and self.total > 0:
+            if complete and self.total and self.total > 0:
                 # Get to 100%.
                 self.eval(self.total)
 
             # Finish the line.
             print('')
+            self._last_frame = None
+            self._cursor = 0
+            self._last_full_redraw = None
 
     def inc(self, amount: int = 1, message: str = ''):
         if amount < 1:
@@ -282,6 +489,145 @@ class ProgressBar(Composite):
             self.current = 0
         self.eval(self.current + amount, message)
 
+    @classmethod
+    def wrap_file(cls, file_object, total: Optional[int] = None, **kwargs) -> 'ProgressFile':
+        """
+        Returns a proxy of a file, which shows the progress of the bytes read from (or written to) it.
+        The total is taken from the size of a readable regular file (an empty file means an unknown total),
+        unless given. Files which are only written to have an unknown total.
+
+        :param file_object: The file object to wrap.
+        :param total: The total number of bytes, or None.
+        :param kwargs: The progress bar parameters.
+        :return: The file proxy.
+        """
+        if total is None:
+            try:
+                file_stat = os.fstat(file_object.fileno())
+                if file_object.readable() and stat.S_ISREG(file_stat.st_mode):
+                    # The bytes before the current position won't be read.
+                    total = file_stat.st_size - (file_object.tell() if file_object.seekable() else 0)
+            except (AttributeError, OSError, ValueError):
+                pass
+            if total is not None and total <= 0:
+                total = None
+        return cls.wrap_stream(file_object, total=total, **kwargs)
+
+    @classmethod
+    def wrap_stream(cls, stream, total: Optional[int] = None, min_interval: float = 0.1, **kwargs) -> 'ProgressFile':
+        """
+        Returns a proxy of a stream (like a socket file or a pipe), which shows the progress of the bytes passing
+        through it.
+
+        :param stream: The stream to wrap.
+        :param total: The total number of bytes, or None.
+        :param min_interval: The minimal number of seconds between two progress bar updates.
+        :param kwargs: The progress bar parameters.
+        :return: The stream proxy.
+        """
+        kwargs.setdefault('rate', True)
+        kwargs.setdefault('show_default_message', False)
+        return ProgressFile(stream, cls(total, track_bytes=True, **kwargs), min_interval=min_interval)
+
+
+class ProgressFile:
+    """
+    A file (or stream) proxy, which counts the bytes passing through it and shows them on a progress bar.
+    Data is never copied - reads and writes go straight to the wrapped file (and readinto fills the caller's buffer).
+    In text mode, characters are counted instead of bytes.
+    """
+
+    def __init__(self, file_object, progress_bar: ProgressBar, min_interval: float = 0.1):
+        """
+        Initializes the file proxy.
+
+        :param file_object: The file object to wrap.
+        :param progress_bar: The progress bar to show the progress on.
+        :param min_interval: The minimal number of seconds between two progress bar updates.
+        """
+        self.file_object = file_object
+        self.progress_bar = progress_bar
+        self.min_interval = min_interval
+        self.bytes_count = 0
+        self._last_update = None
+        self._finished = False
+
+    def _advance(self, amount: int):
+        self.bytes_count += amount
+        now = time.monotonic()
+        # Drawing costs much more than counting, so it's throttled.
+        if self._last_update is None or now - self._last_update >= self.min_interval:
+            self._last_update = now
+            self._update()
+
+    def _update(self):
+        total = self.progress_bar.total
+        current = min(self.bytes_count, total) if total else self.bytes_count
+        message = f'{FileSize(self.bytes_count)} of {FileSize(total)}' if total else str(FileSize(self.bytes_count))
+        self.progress_bar.eval(current, message)
+
+    def read(self, size: int = -1):
+        data = self.file_object.read(size)
+        self._advance(len(data))
+        return data
+
+    def read1(self, size: int = -1):
+        data = self.file_object.read1(size)
+        self._advance(len(data))
+        return data
+
+    def readline(self, size: int = -1):
+        line = self.file_object.readline(size)
+        self._advance(len(line))
+        return line
+
+    def readinto(self, buffer) -> Optional[int]:
+        count = self.file_object.readinto(buffer)
+        if count:
+            self._advance(count)
+        return count
+
+    def readinto1(self, buffer) -> Optional[int]:
+        count = self.file_object.readinto1(buffer)
+        if count:
+            self._advance(count)
+        return count
+
+    def write(self, data) -> int:
+        count = self.file_object.write(data)
+        # Raw streams may write only a part of the data (and non-blocking ones may write nothing).
+        self._advance(count if count is not None else 0)
+        return count
+
+    def __iter__(self) -> Iterator:
+        for line in self.file_object:
+            self._advance(len(line))
+            yield line
+
+    def finish(self):
+        """
+        Draws the final progress, and finishes the progress bar line.
+        """
+        if not self._finished:
+            self._finished = True
+            self._update()
+            # The final progress was just drawn (and it's only 100% if all the bytes passed).
+            self.progress_bar.finish(complete=False)
+
+    def close(self):
+        self.finish()
+        self.file_object.close()
+
+    def __getattr__(self, item):
+        # Everything else (seek, tell, name, etc.) goes to the wrapped file.
+        return getattr(self.file_object, item)
+
+    def __enter__(self) -> 'ProgressFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 
 class ProgressBarIterator:
     """
@@ -289,7 +635,8 @@ class ProgressBarIterator:
     """
 
     def __init__(self, iterable, total: Optional[int] = None, verbose: bool = True, show_default_message: bool = True,
-                 is_lying: bool = False, n_per_cycle: Optional[int] = None):
+                 is_lying: bool = False, n_per_cycle: Optional[int] = None, rate: bool = False,
+                 smoothing: Optional[float] = None):
         """
         Initializes the progress bar iterator.
 
@@ -299,15 +646,20 @@ class ProgressBarIterator:
         :param show_default_message: If True, a default message will be shown next to the progress bar.
         :param is_lying: If True, this is a lying progress bar and you shouldn't believe it!
         :param n_per_cycle: The number of eval calls it takes to switch animation frame.
+        :param rate: If True, the rate (iterations per second) will be shown.
+        :param smoothing: If given, the rate and the time left are computed from a moving average of the recent
+                          progress, with this weight for the newest update (between 0 and 1).
         """
         self._iterator = iter(iterable)
         if total or hasattr(iterable, '__len__'):
             total = total or len(iterable)
             self._progress_bar = ProgressBar(total, verbose=verbose, show_default_message=show_default_message,
-                                             is_lying=is_lying, n_per_cycle=n_per_cycle)
+                                             is_lying=is_lying, n_per_cycle=n_per_cycle, rate=rate,
+                                             smoothing=smoothing)
         else:
             self._progress_bar = ProgressBar(verbose=verbose, show_default_message=show_default_message,
-                                             is_lying=is_lying, n_per_cycle=n_per_cycle)
+                                             is_lying=is_lying, n_per_cycle=n_per_cycle, rate=rate,
+                                             smoothing=smoothing)
 
     def __iter__(self):
         return self
@@ -317,3 +669,147 @@ class ProgressBarIterator:
         if self._progress_bar.total and self._progress_bar.total == self._progress_bar.current:
             self._progress_bar.finish()
         return next(self._iterator)
+
+
+class AsyncProgressBarIterator:
+    """
+    An async iterable version of ProgressBar (for "async for" loops).
+    Items are only counted while iterating, and the progress bar is drawn by a task on the event loop at a fixed
+    refresh rate - so a fast stream of items doesn't block the loop on terminal writes.
+    If the loop may stop before the iteration ends (i.e. on break), use it as an async context manager
+    (or call aclose), so that the refreshing task is stopped and the progress bar is finished. Otherwise, the
+    refreshing task stops by itself once no item was requested for a few refreshes (and restarts with the next item).
+    """
+
+    DEFAULT_REFRESH_INTERVAL = 0.1
+    # The number of refreshes without any item requests after which the refreshing task stops.
+    _MAX_IDLE_REFRESHES = 5
+
+    def __init__(self, async_iterable, total: Optional[int] = None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL, verbose: bool = True,
+                 show_default_message: bool = True, rate: bool = False, smoothing: Optional[float] = None,
+                 differential: Optional[bool] = None):
+        """
+        Initializes the progress bar iterator.
+
+        :param async_iterable: The async iterable to go over.
+        :param total: The total number of iterations (if None, will be extracted from the iterable if possible).
+        :param refresh_interval: The number of seconds between two progress bar draws.
+        :param verbose: If True, the progress bar will be printed to the screen.
+        :param show_default_message: If True, a default message will be shown next to the progress bar.
+        :param rate: If True, the rate (iterations per second) will be shown.
+        :param smoothing: If given, the rate and the time left are computed from a moving average of the recent
+                          progress, with this weight for the newest update (between 0 and 1).
+        :param differential: If True, only the changed parts of the progress bar are redrawn (see ProgressBar).
+        """
+        if total is None and hasattr(async_iterable, '__len__'):
+            total = len(async_iterable)
+        self._iterator = async_iterable.__aiter__()
+        self._progress_bar = ProgressBar(total, verbose=verbose, show_default_message=show_default_message,
+                                         rate=rate, smoothing=smoothing, differential=differential)
+        self.refresh_interval = refresh_interval
+        self.count = 0
+        self._refresh_task = None
+        self._in_next = False
+        self._closed = False
+
+    def __aiter__(self) -> 'AsyncProgressBarIterator':
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        self._in_next = True
+        try:
+            item = await self._iterator.__anext__()
+        except BaseException:
+            # Either the iteration is done, or it failed - both end the progress bar.
+            self._in_next = False
+            await self.aclose()
+            raise
+        self._in_next = False
+        self.count += 1
+        return item
+
+    def _draw(self):
+        total = self._progress_bar.total
+        self._progress_bar.eval(min(self.count, total) if total else self.count)
+
+    async def _refresh(self):
+        # Stop once the loop seems abandoned (i.e. it was broken without closing the iterator).
+        idle_refreshes = 0
+        while idle_refreshes < self._MAX_IDLE_REFRESHES:
+            last_count = self.count
+            self._draw()
+            await asyncio.sleep(self.refresh_interval)
+            idle_refreshes = 0 if self._in_next or self.count != last_count else idle_refreshes + 1
+
+    async def aclose(self):
+        """
+        Stops the refreshing task, and draws the final progress.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._draw()
+            total = self._progress_bar.total
+            self._progress_bar.finish(complete=bool(total) and self.count >= total)
+
+    async def __aenter__(self) -> 'AsyncProgressBarIterator':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    @classmethod
+    def as_completed(cls, awaitables: Iterable[Awaitable], timeout: Optional[float] = None,
+                     **kwargs) -> 'AsyncProgressBarIterator':
+        """
+        Like asyncio.as_completed, but iterated with "async for" (yielding the results in completion order)
+        while showing a progress bar of the completed awaitables.
+
+        :param awaitables: The awaitables to wait for.
+        :param timeout: The number of seconds to wait for all of them (asyncio.TimeoutError is raised after it).
+        :param kwargs: The progress bar iterator parameters.
+        :return: The progress bar iterator of the results.
+        """
+        futures = {asyncio.ensure_future(awaitable) for awaitable in awaitables}
+        return cls(_wait_as_completed(futures, timeout), total=len(futures), **kwargs)
+
+    @classmethod
+    async def gather(cls, *awaitables: Awaitable, return_exceptions: bool = False, **kwargs) -> List[Any]:
+        """
+        Like asyncio.gather, while showing a progress bar of the completed awaitables.
+
+        :param awaitables: The awaitables to wait for.
+        :param return_exceptions: If True, exceptions are returned as results instead of being raised.
+        :param kwargs: The progress bar iterator parameters.
+        :return: The results, in the order of the awaitables.
+        """
+        futures = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+        async with cls(_wait_as_completed(set(futures), None, return_exceptions), total=len(futures),
+                       **kwargs) as progress:
+            async for _ in progress:
+                pass
+        return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+
+async def _wait_as_completed(futures, timeout: Optional[float], return_exceptions: bool = False) -> AsyncIterator:
+    """
+    Yields the results of the futures in completion order.
+    """
+    for future in asyncio.as_completed(futures, timeout=timeout):
+        try:
+            yield await future
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            yield e
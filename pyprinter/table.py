@@ -1,11 +1,268 @@
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import csv
+from datetime import date
+import html
 from io import StringIO
+import math
 import re
-from typing import Dict, List, Optional
+import textwrap
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from pyprinter import get_console_width, get_printer, Printer
-from pyprinter.external.prettytable import PrettyTable
+from pyprinter.file_size import FileSize
+from pyprinter.instrumentation import timed
+from pyprinter.writers import CompressedWriter
+from pyprinter.external.prettytable import _get_size, _str_block_width, PrettyTable
+
+# The PrettyTable characters and padding used by the table rendering functions.
+_VERTICAL_CHAR = '|'
+_HORIZONTAL_CHAR = '-'
+_JUNCTION_CHAR = '+'
+_PADDING = ' '
+
+
+def _justify(text: str, width: int, align: str) -> str:
+    """
+    Justifies the text to the given width, exactly like PrettyTable does.
+
+    :param text: The text to justify.
+    :param width: The width to justify to.
+    :param align: The PrettyTable alignment ('l', 'c' or 'r').
+    :return: The justified text.
+    """
+    text_width = _str_block_width(text)
+    excess = width - text_width
+    if align == 'l':
+        return text + excess * ' '
+    if align == 'r':
+        return excess * ' ' + text
+    # Put more space on the right if the text is of odd length (to match the behaviour of str.center).
+    if excess % 2 and text_width % 2:
+        return (excess // 2) * ' ' + text + (excess // 2 + 1) * ' '
+    if excess % 2:
+        return (excess // 2 + 1) * ' ' + text + (excess // 2) * ' '
+    return (excess // 2) * ' ' + text + (excess // 2) * ' '
+
+
+def _render_cell(value: str, width: int, align: str) -> List[str]:
+    """
+    Renders a single table cell into its (padded) lines, wrapping values which are wider than the column.
+
+    :param value: The formatted cell value.
+    :param width: The column width.
+    :param align: The PrettyTable alignment of the column.
+    :return: The cell lines.
+    """
+    lines = []
+    for line in value.split('\n'):
+        if _str_block_width(line) > width:
+            lines.extend(textwrap.fill(line, width).split('\n'))
+        else:
+            lines.append(line)
+    return [_PADDING + _justify(line, width, align) + _PADDING for line in lines]
+
+
+def _join_cells(cells: List[List[str]], widths: List[int], border: bool) -> str:
+    """
+    Joins the rendered cells of a single row into the row's text.
+
+    :param cells: The rendered lines of every cell in the row.
+    :param widths: The columns widths.
+    :param border: Whether to add a border around the table.
+    :return: The row text (which might span several lines).
+    """
+    separator = _VERTICAL_CHAR if border else ''
+    row_height = max(len(cell_lines) for cell_lines in cells)
+    lines = []
+    for y in range(row_height):
+        line_cells = [cell_lines[y] if y < len(cell_lines) else ' ' * (width + 2 * len(_PADDING))
+                      for cell_lines, width in zip(cells, widths)]
+        lines.append(separator + separator.join(line_cells) + separator)
+    return '\n'.join(lines)
+
+
+def _render_hrule(widths: List[int]) -> str:
+    return _JUNCTION_CHAR + _JUNCTION_CHAR.join(_HORIZONTAL_CHAR * (width + 2 * len(_PADDING))
+                                                for width in widths) + _JUNCTION_CHAR
+
+
+def _render_header(columns: List[str], widths: List[int], aligns: List[str], border: bool) -> str:
+    header = _join_cells([[_PADDING + _justify(column, width, align) + _PADDING]
+                          for column, width, align in zip(columns, widths, aligns)], widths, border)
+    if border:
+        hrule = _render_hrule(widths)
+        return f'{hrule}\n{header}\n{hrule}'
+    return header
+
+
+def _cell_width(value: str, max_width: Optional[int]) -> int:
+    """
+    Returns the width a cell requires from its column.
+    """
+    width = _get_size(value)[0]
+    return width if max_width is None else min(width, max_width)
+
+
+def _chunk_widths(rows: List[List], max_widths: List[Optional[int]]) -> List[int]:
+    """
+    Computes the columns widths required by a chunk of rows (the map step of the parallel width computation).
+    """
+    widths = [0] * len(max_widths)
+    for row in rows:
+        for index, (value, max_width) in enumerate(zip(row, max_widths)):
+            width = _cell_width(str(value), max_width)
+            if width > widths[index]:
+                widths[index] = width
+    return widths
+
+
+def _render_rows_chunk(rows: List[List], widths: List[int], aligns: List[str], border: bool) -> str:
+    """
+    Renders a chunk of rows, given the final columns widths.
+    """
+    return '\n'.join(_join_cells([_render_cell(str(value), width, align)
+                                  for value, width, align in zip(row, widths, aligns)], widths, border)
+                     for row in rows)
+
+
+def _csv_chunk(rows: List[List]) -> str:
+    output = StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
+
+
+def _split_to_chunks(rows: List, workers: int) -> List[List]:
+    """
+    Splits the rows to chunks, several per worker (so that a slow chunk won't keep the other workers idle).
+    """
+    chunk_size = max(1, -(-len(rows) // (workers * 4)))
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+
+class _ColumnFormat(NamedTuple):
+    """
+    The compiled format of a typed column.
+    """
+    formatter: Callable[[Any], str]
+    # Numeric columns are aligned to the right.
+    numeric: bool
+
+
+def _compile_column_type(column_type: Union[type, Tuple[type, Any]]) -> _ColumnFormat:
+    """
+    Compiles a column type into a single formatter, which is applied to all the column values.
+    Values are converted to the column type when no information is lost (i.e. '10' or 10.0 in an int column).
+    Other values (like 'n/a', or 3.7 in an int column) are printed as they are, and None is printed as empty.
+
+    :param column_type: int, float, FileSize, datetime (or date), str, or a tuple of a type and its format -
+                        (float, <number of digits after the point>) or (datetime, <strftime format>).
+    :return: The column format.
+    """
+    column_type, type_format = column_type if isinstance(column_type, tuple) else (column_type, None)
+    is_date = isinstance(column_type, type) and issubclass(column_type, date)
+    if type_format is not None and column_type is not float and not is_date:
+        raise ValueError(f'Column type {column_type!r} does not support a format!')
+
+    if column_type is int:
+        def formatter(value: Any) -> str:
+            if value is None:
+                return ''
+            try:
+                number = int(value)
+            except (TypeError, ValueError):
+                return str(value)
+            # Strings are only converted if they are integers, but other numbers are truncated.
+            return str(number) if isinstance(value, str) or number == value else str(value)
+    elif column_type is float:
+        float_format = '' if type_format is None else f'.{int(type_format)}f'
+
+        def formatter(value: Any) -> str:
+            if value is None:
+                return ''
+            try:
+                return format(float(value), float_format)
+            except (TypeError, ValueError):
+                return str(value)
+    elif column_type is FileSize:
+        def formatter(value: Any) -> str:
+            if value is None:
+                return ''
+            try:
+                return str(FileSize(value))
+            except (TypeError, ValueError):
+                return str(value)
+    elif is_date:
+        def formatter(value: Any) -> str:
+            if value is None:
+                return ''
+            if type_format is not None and isinstance(value, date):
+                return value.strftime(type_format)
+            return str(value)
+    elif column_type is str:
+        def formatter(value: Any) -> str:
+            return '' if value is None else str(value)
+    else:
+        raise ValueError(f'Unknown column type {column_type!r} (use int, float, FileSize, datetime or str)')
+    return _ColumnFormat(formatter, column_type in (int, float, FileSize))
+
+
+# Matches characters whose width isn't one column (or which aren't printable), so cells containing them are measured.
+_NOT_PLAIN_REGEXP = re.compile('[^\x20-\x7e]')
+
+
+class _RowsView(Sequence):
+    """
+    A read-only list of row dictionaries, over compact row tuples (the dictionaries are only built on access).
+    """
+
+    def __init__(self, columns: List[str], rows: List[Tuple]):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [dict(zip(self.columns, row)) for row in self.rows[index]]
+        return dict(zip(self.columns, self.rows[index]))
+
+
+class _IndexedRows(Sequence):
+    """
+    A read-only list of some of the rows of another rows list, by their indexes.
+    """
+
+    def __init__(self, rows: Sequence, indexes: Sequence[int]):
+        self.rows = rows
+        self.indexes = indexes
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.rows[row_index] for row_index in self.indexes[index]]
+        return self.rows[self.indexes[index]]
+
+
+def _to_number(value: Any):
+    """
+    Returns the number a cell value represents (table values are usually strings).
+    """
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    return value
+
+
+def _sort_key(value: Any, reverse: bool = False) -> Tuple[bool, Any]:
+    # Missing values (like NULLs from a database) are sorted last, in both directions.
+    return (value is None) != reverse, value
 
 
 class Table(object):
@@ -18,10 +275,14 @@ class Table(object):
     ALIGN_LEFT = 1
     ALIGN_RIGHT = 2
     _ALIGN_DICTIONARY = {ALIGN_CENTER: 'c', ALIGN_LEFT: 'l', ALIGN_RIGHT: 'r'}
+    DEFAULT_FETCH_SIZE = 1000
+    # The number of first and last rows shown in IPython / Jupyter.
+    DISPLAY_HEAD_ROWS = 10
+    DISPLAY_TAIL_ROWS = 10
 
     def __init__(self, title: str, data: List[Dict[str, str]], column_size_map: Optional[Dict[str, int]] = None,
                  column_size_limit: int = COLUMN_SIZE_LIMIT, headers_color: str = Printer.NORMAL,
-                 title_align: int = ALIGN_CENTER):
+                 title_align: int = ALIGN_CENTER, column_types: Optional[Dict[str, Any]] = None):
         """
         Initializes the table.
 
@@ -31,6 +292,9 @@ class Table(object):
         :param column_size_limit: Column values larger than that size will be truncated.
         :param headers_color: The color of the columns (the headers of the table).
         :param title_align: The alignment of the name of the table.
+        :param column_types: A map between column names and their types - int, float, FileSize, datetime or str,
+                             or (float, <precision>) and (datetime, <strftime format>). Typed columns are formatted
+                             by their type (numeric columns are aligned to the right), and the others with str.
         """
         self.title = title
         self.data = data
@@ -38,46 +302,144 @@ class Table(object):
         if column_size_map:
             for column_name, max_size in column_size_map.items():
                 self._column_size_map[column_name] = max_size
+        self._column_formats = {column: _compile_column_type(column_type)
+                                for column, column_type in (column_types or {}).items()}
         self._headers_color = headers_color
         self.title_align = title_align
+        self.display_head_rows = self.DISPLAY_HEAD_ROWS
+        self.display_tail_rows = self.DISPLAY_TAIL_ROWS
+        # Bumped on changes which the display cache can't detect by itself (see invalidate).
+        self._version = 0
+        self._display_cache_key = None
+        self._display_cache = None
+        # The query indexes (built lazily), and the state of the data they were built for.
+        self._indexes = {}
+        self._indexes_key = None
+
+    @classmethod
+    def from_cursor(cls, cursor, title: str = '', fetch_size: int = DEFAULT_FETCH_SIZE, **kwargs) -> 'Table':
+        """
+        Creates a table from the results of a DB-API cursor (after executing a query).
+        Rows are fetched in chunks and kept as the tuples the cursor returns, instead of a dictionary per row.
+
+        :param cursor: The cursor to fetch the rows from.
+        :param title: The title of the table.
+        :param fetch_size: The number of rows to fetch at once.
+        :param kwargs: The other table parameters (column_size_map, column_size_limit, etc.).
+        :return: The table.
+        """
+        columns = cls._get_cursor_columns(cursor)
+        rows = []
+        for chunk in cls._fetch_chunks(cursor, fetch_size):
+            rows.extend(chunk)
+        return cls(title, _RowsView(columns, rows), **kwargs)
+
+    @classmethod
+    def write_cursor_as_csv(cls, cursor, output_file_path: str, fetch_size: int = DEFAULT_FETCH_SIZE,
+                            compression: Optional[str] = None) -> int:
+        """
+        Streams the results of a DB-API cursor to a CSV file, without keeping them in memory.
 
-    def pretty_print(self, printer: Optional[Printer] = None, align: int = ALIGN_CENTER, border: bool = False):
+        :param cursor: The cursor to fetch the rows from.
+        :param output_file_path: The output file to save the CSV to.
+        :param fetch_size: The number of rows to fetch at once.
+        :param compression: One of 'gzip', 'bz2' or 'xz' to compress the output file while writing it, or None.
+        :return: The number of written rows.
+        """
+        columns = cls._get_cursor_columns(cursor)
+        output = CompressedWriter(output_file_path, compression=compression) if compression else \
+            open(output_file_path, 'w', newline='')
+        rows_count = 0
+        with output:
+            csv_writer = csv.writer(output)
+            csv_writer.writerow(columns)
+            for chunk in cls._fetch_chunks(cursor, fetch_size):
+                csv_writer.writerows(chunk)
+                rows_count += len(chunk)
+        return rows_count
+
+    @staticmethod
+    def _get_cursor_columns(cursor) -> List[str]:
+        if not cursor.description:
+            raise ValueError('The cursor has no results (was a query executed?)')
+        return [column[0] for column in cursor.description]
+
+    @staticmethod
+    def _fetch_chunks(cursor, fetch_size: int):
+        """
+        Yields the cursor rows in chunks of fetch_size rows.
+        """
+        while True:
+            chunk = cursor.fetchmany(fetch_size)
+            if not chunk:
+                return
+            yield chunk
+
+    @timed('Table.pretty_print')
+    def pretty_print(self, printer: Optional[Printer] = None, align: int = ALIGN_CENTER, border: bool = False,
+                     workers: Optional[int] = None):
         """
         Pretty prints the table.
 
         :param printer: The printer to print with.
         :param align: The alignment of the cells(Table.ALIGN_CENTER/ALIGN_LEFT/ALIGN_RIGHT)
         :param border: Whether to add a border around the table
+        :param workers: If bigger than 1, rows will be formatted in parallel by that many processes.
         """
         if printer is None:
             printer = get_printer()
-        table_string = self._get_pretty_table(indent=printer.indents_sum, align=align, border=border).get_string()
+        if printer._disabled:
+            return
+        if workers is not None and workers > 1:
+            table_string = self._get_parallel_string(workers, align=align, border=border)
+        elif self._column_formats:
+            table_string = self._get_typed_string(align=align, border=border)
+        else:
+            table_string = self._get_pretty_table(indent=printer.indents_sum, align=align, border=border).get_string()
         if table_string != '':
-            first_line = table_string.splitlines()[0]
-            first_line_length = len(first_line) - len(re.findall(Printer._ANSI_REGEXP, first_line)) * \
-                Printer._ANSI_COLOR_LENGTH
-            if self.title_align == self.ALIGN_CENTER:
-                title = '{}{}'.format(' ' * (first_line_length // 2 - len(self.title) // 2), self.title)
-            elif self.title_align == self.ALIGN_LEFT:
-                title = self.title
-            else:
-                title = '{}{}'.format(' ' * (first_line_length - len(self.title)), self.title)
-            printer.write_line(printer.YELLOW + title)
+            self._write_title(printer, table_string)
             # We split the table to lines in order to keep the indentation.
             printer.write_line(table_string)
 
+    def _write_title(self, printer: Printer, table_string: str):
+        """
+        Prints the table title, aligned to the table's first line.
+
+        :param printer: The printer to print with.
+        :param table_string: The rendered table.
+        """
+        first_line = table_string.splitlines()[0]
+        first_line_length = len(Printer._ANSI_REGEXP.sub('', first_line))
+        if self.title_align == self.ALIGN_CENTER:
+            title = '{}{}'.format(' ' * (first_line_length // 2 - len(self.title) // 2), self.title)
+        elif self.title_align == self.ALIGN_LEFT:
+            title = self.title
+        else:
+            title = '{}{}'.format(' ' * (first_line_length - len(self.title)), self.title)
+        printer.write_line(printer.YELLOW + title)
+
     @property
     def rows(self) -> List[List[str]]:
         """
         Returns the table rows.
         """
-        return [list(d.values()) for d in self.data]
+        if isinstance(self.data, _RowsView):
+            return list(self.data.rows)
+        return [self._get_row_values(d) for d in self.data]
+
+    def _get_row_values(self, row: Dict[str, Any]) -> List[Any]:
+        """
+        Returns the values of a row dictionary, by the order of the columns.
+        """
+        return list(row.values())
 
     @property
     def columns(self) -> List[str]:
         """
         Returns the table columns.
         """
+        if isinstance(self.data, _RowsView):
+            return list(self.data.columns)
         return list(self.data[0].keys())
 
     def set_column_size_limit(self, column_name: str, size_limit: int):
@@ -92,6 +454,116 @@ class Table(object):
         else:
             raise ValueError(f'There is no column named {column_name}!')
 
+    def _format_columns(self, rows: List[List], columns: List[str]) -> List[List]:
+        """
+        Formats the typed columns of the given rows, applying each column's formatter to the whole column at once.
+
+        :param rows: The rows to format.
+        :param columns: The names of the rows columns.
+        :return: The formatted rows (or the same rows, if no column is typed).
+        """
+        if not self._column_formats or not rows:
+            return rows
+        formatted_columns = []
+        for column, values in zip(columns, zip(*rows)):
+            column_format = self._column_formats.get(column)
+            formatted_columns.append(map(column_format.formatter, values) if column_format else values)
+        return [list(row) for row in zip(*formatted_columns)]
+
+    def _get_aligns(self, align: int) -> List[str]:
+        """
+        Returns the PrettyTable alignment of every column (numeric columns are always aligned to the right).
+        """
+        default_align = self._ALIGN_DICTIONARY[align]
+        aligns = []
+        for column in self.columns:
+            column_format = self._column_formats.get(column)
+            aligns.append('r' if column_format is not None and column_format.numeric else default_align)
+        return aligns
+
+    def _get_colored_rows(self, rows: Optional[List[List]] = None) -> Tuple[List[List[str]], List[str]]:
+        """
+        Returns the (formatted) rows and the columns of the table, with the headers color applied.
+
+        :param rows: The already formatted rows of the table, or None to format them.
+        """
+        columns = self.columns
+        if rows is None:
+            rows = self._format_columns(self.rows, columns)
+        # Add the column color.
+        if self._headers_color != Printer.NORMAL and len(rows) > 0 and len(columns) > 0:
+            # We need to copy the lists so that we wont insert colors in the original ones.
+            rows[0] = list(rows[0])
+            columns = columns[:]
+            columns[0] = self._headers_color + columns[0]
+            # Write the table itself in NORMAL color.
+            rows[0][0] = Printer.NORMAL + str(rows[0][0])
+        return rows, columns
+
+    def _get_parallel_string(self, workers: int, align: int = ALIGN_CENTER, border: bool = False) -> str:
+        """
+        Returns the table string (exactly like PrettyTable's get_string), formatting the rows in several processes.
+        The columns widths are computed per chunk and then reduced, and then the chunks are rendered in order.
+
+        :param workers: The number of processes to use.
+        :param align: The alignment of the cells.
+        :param border: Whether to add a border around the table.
+        :return: The table string.
+        """
+        rows, columns = self._get_colored_rows()
+        if not rows and not border:
+            return ''
+        max_widths_map = dict(self._column_size_map)
+        max_widths = [max_widths_map.get(column) for column in self.columns]
+        aligns = self._get_aligns(align)
+        chunks = _split_to_chunks(rows, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            widths = [_get_size(column)[0] for column in columns]
+            for chunk_widths in executor.map(_chunk_widths, chunks, [max_widths] * len(chunks)):
+                widths = [max(width, chunk_width) for width, chunk_width in zip(widths, chunk_widths)]
+            lines = [_render_header(columns, widths, aligns, border)]
+            lines.extend(executor.map(_render_rows_chunk, chunks, [widths] * len(chunks), [aligns] * len(chunks),
+                                      [border] * len(chunks)))
+        if border:
+            lines.append(_render_hrule(widths))
+        return '\n'.join(lines)
+
+    def _get_typed_string(self, align: int = ALIGN_CENTER, border: bool = False) -> str:
+        """
+        Returns the table string of a table with typed columns (exactly like PrettyTable's get_string).
+        The values are formatted a column at a time, and the widths of columns whose formatted values are plain
+        (printable ASCII, like numbers and dates) are the length of their longest value, instead of measuring
+        every cell.
+
+        :param align: The alignment of the cells.
+        :param border: Whether to add a border around the table.
+        :return: The table string.
+        """
+        columns = self.columns
+        rows = self._format_columns(self.rows, columns)
+        if not rows and not border:
+            return ''
+        max_widths_map = dict(self._column_size_map)
+        widths = []
+        for index, column in enumerate(columns):
+            max_width = max_widths_map.get(column)
+            values = [str(row[index]) for row in rows]
+            if not _NOT_PLAIN_REGEXP.search(''.join(values)):
+                width = max(map(len, values), default=0)
+                width = width if max_width is None else min(width, max_width)
+            else:
+                width = max((_cell_width(value, max_width) for value in values), default=0)
+            widths.append(width)
+        rows, colored_columns = self._get_colored_rows(rows)
+        widths = [max(width, _get_size(column)[0]) for width, column in zip(widths, colored_columns)]
+        aligns = self._get_aligns(align)
+        lines = [_render_header(colored_columns, widths, aligns, border)]
+        if rows:
+            lines.append(_render_rows_chunk(rows, widths, aligns, border))
+        if border:
+            lines.append(_render_hrule(widths))
+        return '\n'.join(lines)
+
     def _get_pretty_table(self, indent: int = 0, align: int = ALIGN_CENTER, border: bool = False) -> PrettyTable:
         """
         Returns the table format of the scheme, i.e.:
@@ -105,26 +577,22 @@ class Table(object):
         | value3(field1) |  value3(field2)
         +----------------+----------------
         """
-        rows = self.rows
-        columns = self.columns
-        # Add the column color.
-        if self._headers_color != Printer.NORMAL and len(rows) > 0 and len(columns) > 0:
-            # We need to copy the lists so that we wont insert colors in the original ones.
-            rows[0] = rows[0][:]
-            columns = columns[:]
-            columns[0] = self._headers_color + columns[0]
-            # Write the table itself in NORMAL color.
-            rows[0][0] = Printer.NORMAL + str(rows[0][0])
-
+        rows, columns = self._get_colored_rows()
         table = PrettyTable(columns, border=border, max_width=get_console_width() - indent)
         table.align = self._ALIGN_DICTIONARY[align]
+        if self._column_formats:
+            for column, column_align in zip(columns, self._get_aligns(align)):
+                table.align[column] = column_align
 
         for row in rows:
             table.add_row(row)
 
         # Set the max width according to the columns size dict, or by default size limit when columns were not provided.
-        for column, max_width in self._column_size_map.items():
-            table.max_width[column] = max_width
+        # The map is keyed by the plain column names, while the table fields may be colored.
+        max_widths_map = dict(self._column_size_map)
+        for column, field in zip(self.columns, columns):
+            if column in max_widths_map:
+                table.max_width[field] = max_widths_map[column]
 
         return table
 
@@ -138,24 +606,662 @@ class Table(object):
         title = ('{:^' + str(len(table_string.splitlines()[0])) + '}').format(self.title)
         return f'<center><h1>{title}</h1></center>{table_string}'
 
-    def get_as_csv(self, output_file_path: Optional[str] = None) -> str:
+    def get_as_csv(self, output_file_path: Optional[str] = None, workers: Optional[int] = None,
+                   compression: Optional[str] = None) -> Optional[str]:
         """
         Returns the table object as a CSV string.
 
         :param output_file_path: The output file to save the CSV to, or None.
-        :return: CSV representation of the table.
+        :param workers: If bigger than 1, rows will be formatted in parallel by that many processes.
+        :param compression: One of 'gzip', 'bz2' or 'xz' to compress the output file while writing it, or None.
+                            Requires an output file, which isn't read back (so None is returned in that case).
+        :return: CSV representation of the table (or None, if it was written compressed).
         """
-        output = StringIO() if not output_file_path else open(output_file_path, 'w')
-        try:
-            csv_writer = csv.writer(output)
+        if compression:
+            if not output_file_path:
+                raise ValueError('Compression requires an output file path!')
+            with CompressedWriter(output_file_path, compression=compression) as output:
+                self._write_csv(output, workers)
+            return None
 
-            csv_writer.writerow(self.columns)
-            for row in self.rows:
-                csv_writer.writerow(row)
+        output = StringIO() if not output_file_path else open(output_file_path, 'w+', newline='')
+        try:
+            self._write_csv(output, workers)
             output.seek(0)
             return output.read()
         finally:
             output.close()
 
+    def _write_csv(self, output, workers: Optional[int] = None):
+        """
+        Writes the table as CSV to the given output.
+
+        :param output: A file-like object to write to.
+        :param workers: If bigger than 1, rows will be formatted in parallel by that many processes.
+        """
+        csv_writer = csv.writer(output)
+
+        csv_writer.writerow(self.columns)
+        if workers is not None and workers > 1:
+            chunks = _split_to_chunks(self.rows, workers)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for chunk_string in executor.map(_csv_chunk, chunks):
+                    output.write(chunk_string)
+        else:
+            for row in self.rows:
+                csv_writer.writerow(row)
+
+    def invalidate(self):
+        """
+        Drops the table caches. Should be called after changing existing rows in the table's data.
+        Adding or removing rows, or replacing the data, is detected automatically.
+        """
+        self._version += 1
+
+    def _get_display_rows(self) -> Tuple[List[str], List[List], int]:
+        """
+        Returns the columns, the rows of the display window (the head and the tail rows) and the number of hidden rows.
+        Hidden rows are never accessed.
+        """
+        rows_count = len(self.data)
+        head = max(0, self.display_head_rows)
+        tail = max(0, self.display_tail_rows)
+        if rows_count > head + tail:
+            window = list(self.data[:head]) + (list(self.data[rows_count - tail:]) if tail > 0 else [])
+        else:
+            window = list(self.data)
+        try:
+            columns = self.columns
+        except IndexError:
+            # A table without rows doesn't know its columns.
+            columns = []
+        return columns, self._format_columns([self._get_row_values(row) for row in window], columns), \
+            rows_count - len(window)
+
+    def _get_display(self) -> Tuple[str, str, Dict]:
+        """
+        Returns the (cached) HTML and text representations of the table, and its metadata.
+        """
+        cache_key = (self._version, id(self.data), len(self.data), self.title, self.display_head_rows,
+                     self.display_tail_rows)
+        if self._display_cache_key == cache_key:
+            return self._display_cache
+        columns, rows, hidden_rows_count = self._get_display_rows()
+        head = max(0, self.display_head_rows)
+
+        def cell(value, tag: str = 'td') -> str:
+            return f'<{tag}>{html.escape(Printer._ANSI_REGEXP.sub("", str(value)))}</{tag}>'
+
+        lines = ['<table>', f'<caption>{html.escape(self.title)}</caption>',
+                 '<thead><tr>' + ''.join(cell(column, 'th') for column in columns) + '</tr></thead>', '<tbody>']
+        row_lines = ['<tr>' + ''.join(cell(value) for value in row) + '</tr>' for row in rows]
+        if hidden_rows_count:
+            row_lines.insert(head, f'<tr><td colspan="{max(1, len(columns))}" style="text-align: center">'
+                                   f'&hellip; {hidden_rows_count} more rows &hellip;</td></tr>')
+        lines.extend(row_lines)
+        lines.append('</tbody></table>')
+        rows_count = len(rows) + hidden_rows_count
+        lines.append(f'<p>{rows_count} rows &times; {len(columns)} columns</p>')
+        text = f'<{type(self).__name__} {self.title!r}: {rows_count} rows x {len(columns)} columns>'
+        metadata = {'rows': rows_count, 'columns': len(columns), 'shown_rows': len(rows)}
+        self._display_cache_key = cache_key
+        self._display_cache = ('\n'.join(lines), text, metadata)
+        return self._display_cache
+
+    def _repr_html_(self) -> str:
+        """
+        Returns the HTML representation of the table for IPython / Jupyter (only the first and last rows are shown).
+        """
+        return self._get_display()[0]
+
+    def _repr_mimebundle_(self, include=None, exclude=None) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+        """
+        Returns the IPython / Jupyter representations of the table, with the rows count metadata.
+        """
+        table_html, text, metadata = self._get_display()
+        return {'text/html': table_html, 'text/plain': text}, {'text/html': metadata}
+
+    def _get_query_rows(self) -> Tuple['Table', Optional[Sequence[int]]]:
+        """
+        Returns the table which holds the rows, and the indexes of this table's rows in it (None means all the rows).
+        """
+        return self, None
+
+    def _get_cached_index(self, kind: str, column: str, build: Callable[[], Any]):
+        """
+        Returns a cached query index of a column, building it if needed.
+        The indexes are dropped when the data is replaced, rows are added or removed, or the table is invalidated.
+        """
+        indexes_key = (self._version, id(self.data), len(self.data))
+        if self._indexes_key != indexes_key:
+            self._indexes = {}
+            self._indexes_key = indexes_key
+        index = self._indexes.get((kind, column))
+        if index is None:
+            index = self._indexes[(kind, column)] = build()
+        return index
+
+    def _get_column_values(self, column: str) -> List[Any]:
+        """
+        Returns the values of a column, for all the rows.
+        """
+        if isinstance(self.data, _RowsView):
+            position = self.data.columns.index(column)
+            return [row[position] for row in self.data.rows]
+        return [row[column] for row in self.data]
+
+    def _get_hash_index(self, column: str) -> Dict[Any, array]:
+        """
+        Returns an index between every value of the column and the (ascending) indexes of the rows which have it.
+        """
+        def build():
+            index = defaultdict(lambda: array('q'))
+            for row_index, value in enumerate(self._get_column_values(column)):
+                index[value].append(row_index)
+            return dict(index)
+
+        return self._get_cached_index('hash', column, build)
+
+    def _get_sorted_index(self, column: str, reverse: bool = False) -> array:
+        """
+        Returns the indexes of all the rows, sorted by the column values (rows with equal values keep their order).
+        """
+        def build():
+            values = self._get_column_values(column)
+            return array('q', sorted(range(len(values)), key=lambda row_index: _sort_key(values[row_index], reverse),
+                                     reverse=reverse))
+
+        return self._get_cached_index('reverse_sorted' if reverse else 'sorted', column, build)
+
+    def where(self, condition: Optional[Callable[[Dict[str, Any]], bool]] = None, **values) -> 'TableView':
+        """
+        Returns a view of the rows which match the condition and the values, i.e.:
+
+            table.where(status='failed')
+            table.where(lambda row: int(row['size']) > 1024, owner={'root', 'admin'})
+
+        Values are matched using cached hash indexes of the columns, so repeated queries don't scan the table.
+
+        :param condition: A function receiving a row dictionary, which returns True for the rows to keep (or None).
+        :param values: The values each column should have (a set, list or tuple means any of its values).
+        :return: A view of the matching rows (no rows are copied).
+        """
+        table, indexes = self._get_query_rows()
+        matching_indexes = None
+        for column, value in values.items():
+            hash_index = table._get_hash_index(column)
+            if isinstance(value, (set, frozenset, list, tuple)):
+                # Repeated options would match their rows twice.
+                column_indexes = sorted(row_index for option in set(value) for row_index in hash_index.get(option, ()))
+            else:
+                column_indexes = hash_index.get(value, ())
+            matching_indexes = column_indexes if matching_indexes is None else \
+                set(matching_indexes).intersection(column_indexes)
+        if matching_indexes is not None:
+            # Keep the order of this table (matches from the indexes are in ascending order).
+            if indexes is None:
+                indexes = sorted(matching_indexes) if isinstance(matching_indexes, set) else matching_indexes
+            else:
+                matching_indexes = matching_indexes if isinstance(matching_indexes, set) else set(matching_indexes)
+                indexes = [row_index for row_index in indexes if row_index in matching_indexes]
+        if condition is not None:
+            rows = table.data
+            indexes = [row_index for row_index in (range(len(rows)) if indexes is None else indexes)
+                       if condition(rows[row_index])]
+        if indexes is None:
+            indexes = range(len(table.data))
+        return TableView(table, array('q', indexes))
+
+    def sort_by(self, column: str, reverse: bool = False, key: Optional[Callable[[Any], Any]] = None) -> 'TableView':
+        """
+        Returns a view of the rows, sorted by a column.
+        Without a key, the sort order of every column is computed once and cached.
+
+        :param column: The column to sort by.
+        :param reverse: If True, the rows are sorted in descending order.
+        :param key: A function of the column value to sort by (for example, int for numeric strings), or None.
+        :return: A view of the sorted rows (no rows are copied).
+        """
+        table, indexes = self._get_query_rows()
+        if key is not None:
+            values = table._get_column_values(column)
+            indexes = sorted(range(len(values)) if indexes is None else indexes,
+                             key=lambda row_index: key(values[row_index]), reverse=reverse)
+        elif indexes is None or len(indexes) * math.log2(len(indexes) + 1) >= len(table.data):
+            # Filtering the cached order is linear, which beats sorting a big view.
+            sorted_index = table._get_sorted_index(column, reverse=reverse)
+            if indexes is None:
+                indexes = sorted_index
+            else:
+                included = bytearray(len(table.data))
+                for row_index in indexes:
+                    included[row_index] = 1
+                indexes = [row_index for row_index in sorted_index if included[row_index]]
+        else:
+            values = table._get_column_values(column)
+            indexes = sorted(indexes, key=lambda row_index: _sort_key(values[row_index], reverse), reverse=reverse)
+        return TableView(table, array('q', indexes))
+
+    def group_by(self, column: str) -> '_GroupBy':
+        """
+        Groups the rows by a column's values, to be aggregated, i.e.:
+
+            table.group_by('owner').agg(files='count', total_size=('sum', 'size'))
+
+        :param column: The column to group by.
+        :return: The grouping (call its agg method to get the aggregated table).
+        """
+        return _GroupBy(self, column)
+
+    def diff(self, other: 'Table', key: Optional[Union[str, List[str]]] = None) -> 'TableDiff':
+        """
+        Compares this table to another (newer) snapshot of it, in linear time.
+        Rows are matched by their key columns, and matched rows are compared by all the columns.
+
+        :param other: The newer table.
+        :param key: The column (or columns) which identify a row, or None to match rows by all their values
+                    (in that case, rows can only be added or removed).
+        :return: The differences (added, removed and changed rows).
+        """
+        columns = self._get_diff_columns(other)
+        key_columns = [key] if isinstance(key, str) else list(key or columns)
+        old_rows = self._get_diff_rows(columns, key_columns)
+        new_rows = other._get_diff_rows(columns, key_columns)
+        added = []
+        changed = []
+        for row_key, new_values in new_rows.items():
+            old_values = old_rows.pop(row_key, None)
+            if old_values is None:
+                added.append(new_values)
+            elif old_values != new_values:
+                changed_columns = [index for index, (old_value, new_value) in enumerate(zip(old_values, new_values))
+                                   if old_value != new_value]
+                changed.append((old_values, new_values, changed_columns))
+        # Whatever wasn't matched by a new row was removed.
+        removed = list(old_rows.values())
+        return TableDiff(f'{self.title} changes', columns, added, removed, changed)
+
+    def _get_diff_columns(self, other: 'Table') -> List[str]:
+        tables_columns = []
+        for table in (self, other):
+            try:
+                tables_columns.append(table.columns)
+            except IndexError:
+                # A table without rows doesn't know its columns.
+                tables_columns.append(None)
+        columns, other_columns = tables_columns
+        if columns is None or other_columns is None:
+            return columns or other_columns or []
+        if set(columns) != set(other_columns):
+            raise ValueError('Can\'t compare tables with different columns!')
+        return columns
+
+    def _get_diff_rows(self, columns: List[str], key_columns: List[str]) -> Dict[Tuple, Tuple]:
+        """
+        Returns the rows values (ordered by the given columns) by their keys.
+        """
+        if not self.data:
+            return {}
+        positions = [self.columns.index(column) for column in columns]
+        key_positions = [columns.index(column) for column in key_columns]
+        compare_whole_rows = len(key_positions) == len(positions)
+        occurrences = defaultdict(int)
+        rows = {}
+        for row in self.rows:
+            values = tuple(row[position] for position in positions)
+            row_key = tuple(values[position] for position in key_positions)
+            if compare_whole_rows:
+                # Identical rows are kept apart by their occurrence number.
+                occurrences[row_key] += 1
+                row_key += (occurrences[row_key], )
+            elif row_key in rows:
+                raise ValueError(f'Duplicate key in table {self.title!r}: {row_key}')
+            rows[row_key] = values
+        return rows
+
     def __iter__(self):
         return iter(self.rows)
+
+
+class TableDiff:
+    """
+    The differences between two snapshots of a table (as returned by Table.diff).
+    """
+
+    ADDED_MARK = '+'
+    REMOVED_MARK = '-'
+    CHANGED_MARK = '~'
+
+    def __init__(self, title: str, columns: List[str], added: List[Tuple], removed: List[Tuple],
+                 changed: List[Tuple[Tuple, Tuple, List[int]]]):
+        """
+        Initializes the differences.
+
+        :param title: The title of the differences table.
+        :param columns: The names of the columns.
+        :param added: The values of the added rows.
+        :param removed: The values of the removed rows.
+        :param changed: The old values, new values and indexes of the changed columns of the changed rows.
+        """
+        self.title = title
+        self.columns = columns
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def get_table(self, colors: bool = True) -> Table:
+        """
+        Returns the differences as a table: added rows (in green), removed rows (in red) and changed rows,
+        where only the changed cells are highlighted (in yellow, with their old and new values).
+
+        :param colors: If False, no colors will be added to the cells.
+        :return: The differences table.
+        """
+        def colored(color: str, value) -> str:
+            return f'{color}{value}{Printer.NORMAL}' if colors else str(value)
+
+        mark_column = ' '
+        data = []
+        for values in self.added:
+            data.append(dict(zip([mark_column] + self.columns, [colored(Printer.GREEN, value)
+                                                                for value in (self.ADDED_MARK, ) + values])))
+        for values in self.removed:
+            data.append(dict(zip([mark_column] + self.columns, [colored(Printer.RED, value)
+                                                                for value in (self.REMOVED_MARK, ) + values])))
+        for old_values, new_values, changed_columns in self.changed:
+            cells = [str(value) for value in new_values]
+            for index in changed_columns:
+                cells[index] = colored(Printer.YELLOW, f'{old_values[index]} -> {new_values[index]}')
+            data.append(dict(zip([mark_column] + self.columns, [colored(Printer.YELLOW, self.CHANGED_MARK)] + cells)))
+        return Table(self.title, data)
+
+    def pretty_print(self, printer: Optional[Printer] = None, align: int = Table.ALIGN_LEFT, border: bool = False):
+        """
+        Pretty prints the differences.
+
+        :param printer: The printer to print with.
+        :param align: The alignment of the cells (Table.ALIGN_CENTER/ALIGN_LEFT/ALIGN_RIGHT).
+        :param border: Whether to add a border around the table.
+        """
+        if printer is None:
+            printer = get_printer()
+        if printer._disabled:
+            return
+        if not self:
+            printer.write_line(printer.GREY + f'{self.title}: no changes.')
+            return
+        self.get_table().pretty_print(printer, align=align, border=border)
+
+
+class LiveTable(Table):
+    """
+    An append-only table, which caches its rendered rows between prints.
+    Appending a row renders only the new row, unless it widens a column - in which case only that column is
+    re-rendered. This makes refreshing a big table cost proportional to the change rather than to the table size.
+    """
+
+    def __init__(self, title: str, columns: List[str], data: Optional[List[Dict[str, str]]] = None,
+                 column_size_map: Optional[Dict[str, int]] = None, column_size_limit: int = Table.COLUMN_SIZE_LIMIT,
+                 headers_color: str = Printer.NORMAL, title_align: int = Table.ALIGN_CENTER,
+                 align: int = Table.ALIGN_CENTER, border: bool = False, column_types: Optional[Dict[str, Any]] = None):
+        """
+        Initializes the live table.
+
+        :param title: The title of the table.
+        :param columns: The names of the table columns.
+        :param data: A list of dictionaries, each representing a row.
+        :param column_size_map: A map between each column name and its max size.
+        :param column_size_limit: Column values larger than that size will be truncated.
+        :param headers_color: The color of the columns (the headers of the table).
+        :param title_align: The alignment of the name of the table.
+        :param align: The alignment of the cells (Table.ALIGN_CENTER/ALIGN_LEFT/ALIGN_RIGHT).
+        :param border: Whether to add a border around the table.
+        :param column_types: A map between column names and their types (see Table).
+        """
+        super().__init__(title, [], column_size_map=column_size_map, column_size_limit=column_size_limit,
+                         headers_color=headers_color, title_align=title_align, column_types=column_types)
+        self._columns = list(columns)
+        self._align = align
+        self._border = border
+        # The render cache: formatted values, rendered cells and joined text of each row, and the column widths.
+        self.invalidate()
+        for row in data or []:
+            self.append(row)
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Returns the table columns.
+        """
+        return self._columns[:]
+
+    def _get_row_values(self, row: Dict[str, Any]) -> List[Any]:
+        # The rows may have their keys in another order than the columns (or miss some of them).
+        return [row.get(column, '') for column in self._columns]
+
+    def _header_columns(self) -> List[str]:
+        columns = self._columns[:]
+        if self._headers_color != Printer.NORMAL and len(columns) > 0:
+            columns[0] = self._headers_color + columns[0]
+        return columns
+
+    def invalidate(self):
+        """
+        Drops the render cache. Should be called after changing existing rows in the table's data.
+        """
+        super().invalidate()
+        header_columns = self._header_columns()
+        max_widths = dict(self._column_size_map)
+        self._max_widths = [max_widths.get(column) for column in self._columns]
+        self._aligns = self._get_aligns(self._align)
+        column_formats = [self._column_formats.get(column) for column in self._columns]
+        self._formatters = [column_format.formatter if column_format else str for column_format in column_formats]
+        self._values = []
+        self._cells = []
+        self._lines = []
+        self._widths = [_get_size(column)[0] for column in header_columns]
+        self._printed_rows = 0
+
+    def set_column_size_limit(self, column_name: str, size_limit: int):
+        super().set_column_size_limit(column_name, size_limit)
+        self.invalidate()
+
+    def append(self, row: Dict[str, str]):
+        """
+        Adds a row to the table, rendering only what has changed.
+
+        :param row: A dictionary representing the row.
+        """
+        self.data.append(row)
+        self._render_new_rows()
+
+    def _render_new_rows(self):
+        """
+        Renders all the rows which are not in the cache yet (for example, rows that were appended to data directly).
+        """
+        for row_index in range(len(self._values), len(self.data)):
+            row_values = self._get_row_values(self.data[row_index])
+            values = [formatter(value) for formatter, value in zip(self._formatters, row_values)]
+            widened_columns = []
+            for column_index, (value, max_width) in enumerate(zip(values, self._max_widths)):
+                if _NOT_PLAIN_REGEXP.search(value):
+                    width = _cell_width(value, max_width)
+                else:
+                    width = len(value) if max_width is None else min(len(value), max_width)
+                if width > self._widths[column_index]:
+                    self._widths[column_index] = width
+                    widened_columns.append(column_index)
+            if row_index == 0 and self._headers_color != Printer.NORMAL and len(values) > 0:
+                # Write the table itself in NORMAL color.
+                values[0] = Printer.NORMAL + values[0]
+            self._values.append(values)
+            self._cells.append([_render_cell(value, width, align)
+                                for value, width, align in zip(values, self._widths, self._aligns)])
+            # Re-render the widened columns of the previous rows (the new row was already rendered with them).
+            if widened_columns:
+                for previous_index in range(row_index):
+                    previous_cells = self._cells[previous_index]
+                    previous_values = self._values[previous_index]
+                    for column_index in widened_columns:
+                        previous_cells[column_index] = _render_cell(previous_values[column_index],
+                                                                    self._widths[column_index],
+                                                                    self._aligns[column_index])
+                    self._lines[previous_index] = _join_cells(previous_cells, self._widths, self._border)
+            self._lines.append(_join_cells(self._cells[row_index], self._widths, self._border))
+
+    def get_string(self) -> str:
+        """
+        Returns the table (without its title) as a string.
+        """
+        self._render_new_rows()
+        if not self._lines and not self._border:
+            return ''
+        lines = [_render_header(self._header_columns(), self._widths, self._aligns, self._border)] + self._lines
+        if self._border:
+            lines.append(_render_hrule(self._widths))
+        return '\n'.join(lines)
+
+    @timed('LiveTable.pretty_print')
+    def pretty_print(self, printer: Optional[Printer] = None, align: Optional[int] = None,
+                     border: Optional[bool] = None):
+        """
+        Pretty prints the table.
+
+        :param printer: The printer to print with.
+        :param align: The alignment of the cells (changing it drops the render cache).
+        :param border: Whether to add a border around the table (changing it drops the render cache).
+        """
+        if (align is not None and align != self._align) or (border is not None and border != self._border):
+            self._align = self._align if align is None else align
+            self._border = self._border if border is None else border
+            self.invalidate()
+        if printer is None:
+            printer = get_printer()
+        if printer._disabled:
+            return
+        table_string = self.get_string()
+        self._printed_rows = len(self._lines)
+        if table_string != '':
+            self._write_title(printer, table_string)
+            printer.write_line(table_string)
+
+    def pretty_print_new_rows(self, printer: Optional[Printer] = None):
+        """
+        Prints only the rows that were added since the last print (useful for log-like live tables).
+        Note that rows which were already printed won't be re-aligned if a new row widens a column.
+
+        :param printer: The printer to print with.
+        """
+        if printer is None:
+            printer = get_printer()
+        if printer._disabled:
+            return
+        self._render_new_rows()
+        new_lines = self._lines[self._printed_rows:]
+        self._printed_rows = len(self._lines)
+        if new_lines:
+            printer.write_line('\n'.join(new_lines))
+
+
+class TableView(Table):
+    """
+    A view of some of the rows of a table (in some order), as returned by the table's query methods.
+    Only the rows indexes are kept, so the view is cheap to create even for huge tables.
+    Views can be printed and exported like tables, and queried further.
+    """
+
+    def __init__(self, table: Table, indexes: Sequence[int]):
+        """
+        Initializes the view.
+
+        :param table: The table which holds the rows.
+        :param indexes: The indexes of the view rows in the table.
+        """
+        super().__init__(table.title, _IndexedRows(table.data, indexes), headers_color=table._headers_color,
+                         title_align=table.title_align)
+        self._column_size_map = table._column_size_map
+        self._column_formats = table._column_formats
+        self._table = table
+        self.indexes = indexes
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Returns the table columns.
+        """
+        return self._table.columns
+
+    def _get_query_rows(self) -> Tuple[Table, Optional[Sequence[int]]]:
+        return self._table, self.indexes
+
+
+class _GroupBy:
+    """
+    The rows of a table, grouped by a column (as returned by Table.group_by).
+    """
+
+    AGGREGATIONS = ('count', 'sum', 'min', 'max')
+
+    def __init__(self, table: Table, column: str):
+        self._table = table
+        self.column = column
+
+    def _get_groups(self) -> Iterable[Tuple[Any, Sequence[int]]]:
+        """
+        Returns the values of the grouped column, and the indexes of their rows (in the order of appearance).
+        """
+        table, indexes = self._table._get_query_rows()
+        if indexes is None:
+            return table._get_hash_index(self.column).items()
+        values = table._get_column_values(self.column)
+        groups = defaultdict(list)
+        for row_index in indexes:
+            groups[values[row_index]].append(row_index)
+        return groups.items()
+
+    def agg(self, **aggregations: Union[str, Tuple[str, str]]) -> Table:
+        """
+        Aggregates every group into a row of a new table.
+
+        :param aggregations: The new columns - 'count', or an aggregation ('count', 'sum', 'min' or 'max')
+                             and the column to aggregate, i.e.: rows='count', total_size=('sum', 'size').
+                             Missing values are skipped by sum, min and max (which give 0, None and None
+                             for groups without values).
+        :return: A table with the grouped column and the aggregations columns (a row per group).
+        """
+        table, _ = self._table._get_query_rows()
+        compiled = []
+        for name, aggregation in aggregations.items():
+            function, column = (aggregation, None) if isinstance(aggregation, str) else aggregation
+            if function not in self.AGGREGATIONS:
+                raise ValueError(f'Unknown aggregation {function!r} (use one of: {", ".join(self.AGGREGATIONS)})')
+            if function != 'count' and column is None:
+                raise ValueError(f'The {function!r} aggregation requires a column!')
+            compiled.append((name, function, table._get_column_values(column) if column is not None else None))
+
+        data = []
+        for value, row_indexes in self._get_groups():
+            row = {self.column: value}
+            for name, function, values in compiled:
+                if function == 'count':
+                    row[name] = len(row_indexes)
+                    continue
+                # Missing values (like NULLs from a database) are skipped, like SQL does.
+                group_values = [values[row_index] for row_index in row_indexes if values[row_index] is not None]
+                if function == 'sum':
+                    row[name] = sum(_to_number(group_value) for group_value in group_values)
+                elif not group_values:
+                    row[name] = None
+                else:
+                    aggregate = min if function == 'min' else max
+                    try:
+                        row[name] = aggregate(group_values, key=_to_number)
+                    except (TypeError, ValueError):
+                        # Not numbers, so compare the values themselves.
+                        row[name] = aggregate(group_values)
+            data.append(row)
+        return Table(f'{self._table.title} by {self.column}', data, headers_color=table._headers_color,
+                     title_align=table.title_align)
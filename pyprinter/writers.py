@@ -0,0 +1,585 @@
+import atexit
+import bz2
+from collections import OrderedDict
+import gzip
+import io
+import lzma
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, IO, List, Optional, Union
+import weakref
+
+from pyprinter.printer import FormattedLine, Printer
+
+
+class FileWriter:
+    """
+    A writing stream to a file, optimized for huge outputs.
+    Text is encoded into a growable buffer, which is handed to the OS in big contiguous chunks.
+    """
+
+    DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, output_file_path: str, encoding: str = 'UTF-8', buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 append: bool = False):
+        """
+        Initializes the file writer.
+
+        :param output_file_path: The path of the file to write to.
+        :param encoding: The encoding of the written text.
+        :param buffer_size: The number of bytes to buffer before writing them to the file.
+        :param append: If True, the text will be appended to the file instead of overwriting it.
+        """
+        self.output_file_path = output_file_path
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        # O_BINARY (Windows only) keeps the OS from translating the newlines of the raw writes.
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC) | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(output_file_path, flags, 0o644)
+        self._buffer = bytearray()
+
+    def write(self, text: str):
+        self._buffer += text.encode(self.encoding)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all the buffered bytes to the file.
+        """
+        with memoryview(self._buffer) as view:
+            written = 0
+            while written < len(view):
+                written += os.write(self._fd, view[written:])
+        del self._buffer[:]
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                self.flush()
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+    def isatty(self) -> bool:
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CompressedWriter:
+    """
+    A writing stream to a compressed file (gzip, bz2 or xz), for reports which would be compressed anyway.
+    Text is encoded into big chunks, which are compressed and written by a background thread - so that
+    the formatting thread isn't blocked by the compression.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    DEFAULT_QUEUE_SIZE = 8
+    COMPRESSIONS = {
+        'gzip': gzip.open,
+        'bz2': bz2.open,
+        'xz': lzma.open
+    }
+    _EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+    def __init__(self, output_file_path: str, compression: Optional[str] = None, encoding: str = 'UTF-8',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, queue_size: int = DEFAULT_QUEUE_SIZE, append: bool = False):
+        """
+        Initializes the compressed writer.
+
+        :param output_file_path: The path of the file to write to.
+        :param compression: One of 'gzip', 'bz2' or 'xz' (default is by the file extension, or gzip).
+        :param encoding: The encoding of the written text.
+        :param chunk_size: The number of bytes to batch before handing them to the compressing thread.
+        :param queue_size: The number of chunks to queue before the printing thread has to wait for the compression.
+        :param append: If True, a new compressed stream will be appended to the file instead of overwriting it.
+        """
+        if compression is None:
+            compression = self._EXTENSIONS.get(os.path.splitext(output_file_path)[1], 'gzip')
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f'Unknown compression {compression!r} (use one of: {", ".join(self.COMPRESSIONS)})')
+        self.output_file_path = output_file_path
+        self.compression = compression
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._error = None
+        # Opening the file here makes errors (like a missing directory) surface in the caller's thread.
+        self._file = self.COMPRESSIONS[compression](output_file_path, 'ab' if append else 'wb')
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name='pyprinter-compressed-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, text: str):
+        self._buffer += text.encode(self.encoding)
+        if len(self._buffer) >= self.chunk_size:
+            self._hand_off()
+
+    def _hand_off(self):
+        """
+        Hands the buffered bytes to the compressing thread.
+        """
+        self._raise_error()
+        if self._buffer:
+            self._queue.put(bytes(self._buffer))
+            del self._buffer[:]
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            try:
+                if chunk is None:
+                    return
+                if self._error is None:
+                    self._file.write(chunk)
+            except Exception as e:
+                # Keep draining the queue so the printing thread won't block, the error is raised on its next call.
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self):
+        """
+        Waits until all the written text is compressed and written to the file.
+        """
+        self._hand_off()
+        self._queue.join()
+        self._raise_error()
+        self._file.flush()
+
+    def close(self):
+        if self._thread.is_alive():
+            try:
+                self._hand_off()
+            finally:
+                self._queue.put(None)
+                self._thread.join()
+                self._file.close()
+            self._raise_error()
+
+    def isatty(self) -> bool:
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DedupWriter:
+    """
+    A writer which suppresses floods before they reach another writer.
+    Consecutive repeats of the same line are collapsed into a periodic "last line repeated N times" summary,
+    and lines can optionally be rate limited (with a token bucket per message key).
+    Lines are compared without their colors, so that color resets between them don't matter.
+    """
+
+    SUMMARY_FORMAT = '... last line repeated {} times\n'
+    # Lines longer than that are passed on as they are, to keep the memory bounded.
+    MAX_LINE_LENGTH = 64 * 1024
+
+    def __init__(self, writer, summary_interval: float = 5.0, rate: Optional[float] = None, burst: int = 10,
+                 key: Optional[Callable[[str], str]] = None, max_keys: int = 1024):
+        """
+        Initializes the dedup writer.
+
+        :param writer: The writer to pass the text on to.
+        :param summary_interval: The number of seconds between two summaries of an ongoing repetition.
+        :param rate: The number of lines per second allowed for each message key, or None for no rate limiting.
+        :param burst: The number of lines allowed in a burst, before the rate limiting kicks in.
+        :param key: A function returning the message key of a line (default is the line itself).
+        :param max_keys: The maximal number of message keys to track (the least recently used keys are dropped).
+        """
+        self._writer = writer
+        self.summary_interval = summary_interval
+        self.rate = rate
+        self.burst = burst
+        self._key = key
+        self._max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._pending = []
+        self._pending_length = 0
+        self._last_hash = None
+        self._repeats = 0
+        self._last_summary_time = 0
+        self.suppressed_lines = 0
+        self.suppressed_bytes = 0
+        self.rate_limited_lines = 0
+
+    def write(self, text: str):
+        start = 0
+        while True:
+            line_end = text.find(Printer.LINE_SEP, start) + 1
+            if line_end == 0:
+                if start < len(text):
+                    self._pending.append(text[start:])
+                    self._pending_length += len(text) - start
+                    if self._pending_length > self.MAX_LINE_LENGTH:
+                        self._flush_pending()
+                return
+            self._pending.append(text[start:line_end])
+            line = ''.join(self._pending)
+            self._pending = []
+            self._pending_length = 0
+            self._handle_line(line)
+            start = line_end
+
+    def _handle_line(self, line: str):
+        plain_line = Printer._ANSI_REGEXP.sub('', line)
+        line_hash = hash(plain_line)
+        now = time.monotonic()
+        if line_hash == self._last_hash:
+            if self._repeats == 0:
+                self._last_summary_time = now
+            self._suppress(line)
+            self._repeats += 1
+            if now - self._last_summary_time >= self.summary_interval:
+                self._write_summary()
+                self._last_summary_time = now
+            return
+        self._write_summary()
+        if self.rate is not None:
+            key = plain_line if self._key is None else self._key(plain_line)
+            if not self._take_token(key, now):
+                self._suppress(line)
+                self.rate_limited_lines += 1
+                return
+        self._last_hash = line_hash
+        self._writer.write(line)
+
+    def _take_token(self, key: str, now: float) -> bool:
+        """
+        Takes a token from the key's bucket.
+
+        :return: True if there was a token to take (meaning that the line may be written).
+        """
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [self.burst, now]
+            if len(self._buckets) >= self._max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self._buckets[key] = bucket
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def _suppress(self, line: str):
+        self.suppressed_lines += 1
+        self.suppressed_bytes += len(line.encode('UTF-8', 'replace'))
+
+    def _write_summary(self):
+        if self._repeats > 0:
+            self._writer.write(self.SUMMARY_FORMAT.format(self._repeats))
+            self._repeats = 0
+
+    def _flush_pending(self):
+        """
+        Passes on the incomplete line as it is.
+        """
+        if self._pending:
+            self._write_summary()
+            self._writer.write(''.join(self._pending))
+            self._pending = []
+            self._pending_length = 0
+            self._last_hash = None
+
+    def flush(self):
+        """
+        Writes the pending summary and the incomplete line (if there are any).
+        """
+        self._write_summary()
+        self._flush_pending()
+        if hasattr(self._writer, 'flush'):
+            self._writer.flush()
+
+    def close(self):
+        self.flush()
+        if hasattr(self._writer, 'close'):
+            self._writer.close()
+
+    def isatty(self) -> bool:
+        isatty = getattr(self._writer, 'isatty', None)
+        return isatty is None or isatty()
+
+
+# The sinks which weren't closed yet, flushed when the interpreter exits (their threads are daemons).
+_open_sinks = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_sinks():
+    for sink in list(_open_sinks):
+        try:
+            sink.flush()
+        except Exception:
+            pass
+
+
+class TeeSink:
+    """
+    A single output of a TeeWriter.
+    Each sink gets its own projection of the formatted text (colored or plain, wrapped or raw),
+    and its own buffer and thread - so that a slow sink won't stall the others.
+    Sinks should be closed when done (i.e. by closing the TeeWriter). Sinks which are still open when
+    the interpreter exits are flushed, but their writers aren't closed.
+    """
+
+    DEFAULT_BUFFER_SIZE = 10000
+
+    def __init__(self, writer, colors: bool = True, wrapped: bool = True, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Initializes the sink.
+
+        :param writer: The writer of this sink (for example - a DefaultWriter or a FileWriter).
+        :param colors: If False, colors will be stripped from the text.
+        :param wrapped: If False, line breaks added by the width limiting will be removed.
+        :param buffer_size: The number of writes to buffer before the printing thread has to wait for this sink.
+        """
+        self.writer = writer
+        self.colors = colors
+        self.wrapped = wrapped
+        self.last_error = None
+        # True if the last projected line was cut by a removed soft break.
+        self._in_continuation = False
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._thread = threading.Thread(target=self._run, name='pyprinter-tee-sink', daemon=True)
+        self._thread.start()
+        _open_sinks.add(self)
+
+    def put(self, item: Union[str, List[FormattedLine]]):
+        self._queue.put(item)
+
+    def _project(self, item: Union[str, List[FormattedLine]]) -> str:
+        """
+        Returns the sink's projection of plain text or formatted lines.
+        """
+        if isinstance(item, str):
+            text = item
+        else:
+            parts = []
+            for line in item:
+                if not self._in_continuation:
+                    parts.append(line.indent)
+                if line.soft_break and not self.wrapped:
+                    parts.append(line.text[:-len(Printer.LINE_SEP)])
+                    self._in_continuation = True
+                else:
+                    parts.append(line.text)
+                    self._in_continuation = False
+            text = ''.join(parts)
+        if not self.colors and Printer._ANSI_COLOR_PREFIX in text:
+            text = Printer._ANSI_REGEXP.sub('', text)
+        return text
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.writer.write(self._project(item))
+            except Exception as e:
+                # Keep serving the next writes, a failing sink shouldn't stop the printing.
+                self.last_error = e
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Waits until all the buffered writes are written.
+        """
+        self._queue.join()
+        if hasattr(self.writer, 'flush'):
+            self.writer.flush()
+
+    def close(self):
+        _open_sinks.discard(self)
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if hasattr(self.writer, 'close'):
+            self.writer.close()
+
+
+class TeeWriter:
+    """
+    A writer which formats the text once, and writes it to several sinks.
+    The printer's formatting (wrapping, color tracking and indentation) is done once per message, and each sink
+    only projects the result (i.e. a colored terminal and a plain log file).
+    For best results, use it with a printer which has both colors and width limiting enabled.
+    """
+
+    def __init__(self, sinks: List[TeeSink]):
+        """
+        Initializes the tee writer.
+
+        :param sinks: The sinks to write to.
+        """
+        self.sinks = sinks
+
+    def write(self, text: str):
+        for sink in self.sinks:
+            sink.put(text)
+
+    def write_formatted(self, lines: List[FormattedLine]):
+        for sink in self.sinks:
+            sink.put(lines)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def isatty(self) -> bool:
+        # If any of the sinks is a terminal, formatting is required.
+        return any(getattr(sink.writer, 'isatty', lambda: True)() for sink in self.sinks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RingBufferWriter:
+    """
+    A writer which keeps only the last bytes written to it, in a preallocated in-memory ring buffer.
+    Cheap enough to always be on (i.e. as a TeeWriter sink), for dumping the recent output after a crash.
+    """
+
+    DEFAULT_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, size: int = DEFAULT_SIZE, encoding: str = 'UTF-8'):
+        """
+        Initializes the ring buffer writer.
+
+        :param size: The size of the buffer, in bytes.
+        :param encoding: The encoding of the written text.
+        """
+        self.size = size
+        self.encoding = encoding
+        self._buffer = bytearray(size)
+        # The position of the next write, and whether the buffer has already wrapped around.
+        self._position = 0
+        self._is_full = False
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        data = text.encode(self.encoding, 'replace')
+        length = len(data)
+        with self._lock:
+            if length >= self.size:
+                # Only the end of the data fits.
+                self._buffer[:] = data[-self.size:]
+                self._position = 0
+                self._is_full = True
+                return
+            end = self._position + length
+            if end <= self.size:
+                self._buffer[self._position:end] = data
+            else:
+                first_part_length = self.size - self._position
+                self._buffer[self._position:] = data[:first_part_length]
+                self._buffer[:length - first_part_length] = data[first_part_length:]
+            if end >= self.size:
+                self._is_full = True
+            self._position = end % self.size
+
+    def _segments(self) -> List[memoryview]:
+        """
+        Returns views of the buffer's content, in the order in which it was written.
+        """
+        view = memoryview(self._buffer)
+        if self._is_full:
+            return [view[self._position:], view[:self._position]]
+        return [view[:self._position]]
+
+    def getvalue(self) -> bytes:
+        """
+        Returns the buffer's content.
+        """
+        with self._lock:
+            return b''.join(self._segments())
+
+    def dump(self, output_file: IO):
+        """
+        Writes the buffer's content to the given file (either binary or text).
+
+        :param output_file: The file to write to.
+        """
+        if isinstance(output_file, io.TextIOBase):
+            output_file.write(self.getvalue().decode(self.encoding, 'replace'))
+            output_file.flush()
+            return
+        with self._lock:
+            for segment in self._segments():
+                output_file.write(segment)
+        output_file.flush()
+
+    def tail(self, n_lines: int) -> List[str]:
+        """
+        Returns the last lines in the buffer (the first of them might be cut by the wraparound).
+
+        :param n_lines: The number of lines to return.
+        :return: A list of the lines (without their line breaks).
+        """
+        content = self.getvalue()
+        line_sep = Printer.LINE_SEP.encode(self.encoding)
+        # Ignore the line break of the last line.
+        end = len(content) - len(line_sep) if content.endswith(line_sep) else len(content)
+        start = end
+        for _ in range(n_lines):
+            start = content.rfind(line_sep, 0, start)
+            if start == -1:
+                break
+        start = 0 if start == -1 else start + len(line_sep)
+        if n_lines <= 0 or not content:
+            return []
+        return content[start:end].decode(self.encoding, 'replace').split(Printer.LINE_SEP)
+
+    def install_crash_hook(self, output_file: Optional[IO] = None, at_exit: bool = False):
+        """
+        Dumps the buffer when the process crashes on an unhandled exception (and optionally also on exit).
+
+        :param output_file: The file to dump the buffer to (default is stderr).
+        :param at_exit: If True, the buffer will also be dumped when the interpreter exits.
+        """
+        previous_hook = sys.excepthook
+
+        def crash_hook(exc_type, exc_val, exc_tb):
+            self.dump(output_file or sys.stderr)
+            previous_hook(exc_type, exc_val, exc_tb)
+
+        sys.excepthook = crash_hook
+        if at_exit:
+            atexit.register(lambda: self.dump(output_file or sys.stderr))
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+__all__ = ['FileWriter', 'CompressedWriter', 'DedupWriter', 'TeeSink', 'TeeWriter', 'RingBufferWriter']
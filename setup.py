@@ -7,6 +7,7 @@ from setuptools import setup, find_packages
 setup_requirements = ['pytest-runner'] if {'pytest', 'test', 'ptr'}.intersection(sys.argv) else []
 install_requirements = ['ipykernel', 'pyreadline; platform_system == "Windows"']
 test_requirements = ['pytest', 'pytest-pep8', 'pytest-flakes']
+benchmark_requirements = ['pytest', 'pytest-benchmark']
 
 # Fetch readme content.
 with open('README.rst', 'r') as readme_file:
@@ -26,7 +27,8 @@ setup(name='pyprinter',
       install_requires=install_requirements,
       tests_require=test_requirements,
       extras_require={
-          'test': test_requirements
+          'test': test_requirements,
+          'benchmark': benchmark_requirements
       },
       include_package_data=True,
       keywords='Python, Python3, color, print, unicode, encoding',
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from pyprinter import FileSize
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'c').mkdir()
+    (tmp_path / 'root.txt').write_bytes(b'x' * 10)
+    (tmp_path / 'a' / 'a.txt').write_bytes(b'x' * 100)
+    (tmp_path / 'a' / 'b' / 'b.txt').write_bytes(b'x' * 1000)
+    (tmp_path / 'c' / 'c.txt').write_bytes(b'x' * 10000)
+    # A hard link is counted only once.
+    os.link(str(tmp_path / 'c' / 'c.txt'), str(tmp_path / 'a' / 'c_link.txt'))
+    # A link back to the root shouldn't cause an endless scan.
+    os.symlink(str(tmp_path), str(tmp_path / 'c' / 'loop'))
+    return tmp_path
+
+
+def test_scan_tree(tree):
+    sizes = FileSize.scan_tree(str(tree), workers=4)
+    # Links which aren't followed are counted by their own size (like du does).
+    link_size = os.lstat(str(tree / 'c' / 'loop')).st_size
+    assert sizes[str(tree)] == 11110 + link_size
+    assert sizes[str(tree / 'a' / 'b')] == 1000
+    # The linked file is counted in the directory of its smallest path.
+    assert sizes[str(tree / 'a')] == 11100
+    assert sizes[str(tree / 'c')] == link_size
+    assert len(sizes) == 4
+
+
+def test_scan_tree_follow_symlinks(tree):
+    sizes = FileSize.scan_tree(str(tree), follow_symlinks=True)
+    assert sizes[str(tree)] == 11110
+    assert str(tree / 'c' / 'loop') not in sizes
+
+
+def test_of_path(tree):
+    assert FileSize.of_path(str(tree), follow_symlinks=True) == 11110
+    assert FileSize.of_path(str(tree / 'root.txt')) == 10
+    with pytest.raises(NotADirectoryError):
+        FileSize.scan_tree(str(tree / 'root.txt'))
+
+
+def test_tree_table(tree):
+    table = FileSize.get_tree_table(FileSize.scan_tree(str(tree), follow_symlinks=True), top=2, colors=False)
+    assert table.columns == ['Size', 'Path']
+    assert [row[1] for row in table.rows] == [str(tree), str(tree / 'a')]
+    assert table.rows[0][0] == '10.8 KB'
@@ -0,0 +1,68 @@
+from io import StringIO
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pyprinter
+from pyprinter import DefaultWriter, printer, Printer, table
+
+
+@pytest.fixture
+def stats_enabled(monkeypatch):
+    monkeypatch.setattr(printer, 'get_console_width', lambda: 80)
+    pyprinter.reset_stats()
+    pyprinter.enable_stats()
+    yield
+    pyprinter.disable_stats()
+    pyprinter.set_stats_hook(None)
+    pyprinter.reset_stats()
+
+
+def test_stats_collection(stats_enabled):
+    printer_instance = Printer(DefaultWriter(StringIO()), colors=True)
+    printer_instance.write_line(printer_instance.YELLOW + 'A' * 100)
+    snapshot = pyprinter.stats()
+    assert snapshot['timings']['Printer.write']['calls'] == 1
+    assert snapshot['timings']['Printer._split_lines']['calls'] == 1
+    assert snapshot['counters']['lines_wrapped'] == 1
+    assert snapshot['counters']['color_codes'] == 1
+    assert snapshot['counters']['bytes_written'] > 100
+
+
+def test_stats_disabled():
+    pyprinter.reset_stats()
+    Printer(DefaultWriter(StringIO()), colors=False, width_limit=False).write_line('test')
+    assert pyprinter.stats()['timings'] == {}
+
+
+def _timed_functions():
+    return [Printer.write, DefaultWriter.write, printer.get_console_width, table.get_console_width,
+            pyprinter.get_console_width, table.LiveTable.pretty_print]
+
+
+def test_stats_wrappers():
+    # The timing wrappers are only swapped in while the stats are enabled.
+    assert not any(hasattr(function, '__wrapped__') for function in _timed_functions())
+    pyprinter.enable_stats()
+    try:
+        assert all(hasattr(function, '__wrapped__') for function in _timed_functions())
+        table.get_console_width()
+        assert pyprinter.stats()['timings']['get_console_width']['calls'] == 1
+    finally:
+        pyprinter.disable_stats()
+        pyprinter.reset_stats()
+    assert not any(hasattr(function, '__wrapped__') for function in _timed_functions())
+    # The stats may also be enabled from the start.
+    code = 'import pyprinter; pyprinter.get_console_width(); print(pyprinter.stats()["timings"]["get_console_width"])'
+    output = subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ, PYPRINTER_STATS='1'))
+    assert b"'calls': 1" in output
+
+
+def test_stats_hook(stats_enabled):
+    snapshots = []
+    pyprinter.set_stats_hook(snapshots.append, interval=0)
+    Printer(DefaultWriter(StringIO()), colors=False).write_line('test')
+    assert len(snapshots) > 0
+    assert 'Printer.write' in snapshots[-1]['timings']
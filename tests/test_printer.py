@@ -1,6 +1,11 @@
+import gc
+from io import StringIO
+import weakref
+
 import pytest
 
-from pyprinter import DefaultWriter, printer, Printer
+import pyprinter
+from pyprinter import DefaultWriter, printer, Printer, Style
 
 
 def _prepare_lines(original_lines):
@@ -87,3 +92,150 @@ def test_multi_indented_split_lines(color_printer, original_lines, split_lines,
         with color_printer.group(indent=second_indent_size):
             for result_line, expected_line in zip(color_printer._split_lines(original_lines), split_lines):
                 assert result_line == expected_line + '\n'
+
+
+def test_to_file(tmp_path):
+    output_file_path = str(tmp_path / 'output.txt')
+    with Printer.to_file(output_file_path) as file_printer:
+        with file_printer.group(indent=2):
+            file_printer.write_line(file_printer.YELLOW + 'Hello')
+            file_printer.write_line('World!' * 10000)
+    with open(output_file_path, 'r') as output_file:
+        assert output_file.read() == '  Hello\n  ' + 'World!' * 10000 + '\n'
+
+
+@pytest.mark.parametrize('is_list', [False, True])
+def test_write_aligned_many(color_printer, is_list):
+    """
+    Test that printing an aligned block prints exactly like printing each of its items.
+    """
+    if is_list:
+        items = {'first': ['a', 'b' * 100], 'second': [], 'third': ['c']}
+    else:
+        items = {'first': 'a', 'second': None, 'third': True, 'fourth': 'b' * 100}
+    outputs = []
+    for write_all in [
+            lambda p: [p.write_aligned(key, value, is_list=is_list, align_size=10) for key, value in items.items()],
+            lambda p: p.write_aligned_many(items, is_list=is_list, align_size=10)]:
+        output = StringIO()
+        aligned_printer = Printer(DefaultWriter(output), colors=True)
+        with aligned_printer.group(indent=2):
+            write_all(aligned_printer)
+        # Compare the printed text (colors codes might be placed a bit differently).
+        outputs.append(Printer._ANSI_REGEXP.sub('', output.getvalue()))
+    assert outputs[0] == outputs[1]
+
+
+def test_styles(color_printer):
+    assert Printer.YELLOW == '\x1b[1;33m'
+    assert Style.color256(196) == '\x1b[38;5;196m'
+    assert Printer.YELLOW | Style.rgb(0, 0, 255, background=True) == '\x1b[1;33;48;2;0;0;255m'
+    assert Style.color256(196)('test') == '\x1b[38;5;196mtest' + Printer.NORMAL
+
+
+def test_split_lines_with_long_color_codes(color_printer):
+    """
+    Test that long color codes (like 256 colors and true colors) don't take space in the line.
+    """
+    long_color = Style.rgb(255, 128, 0)
+    original_lines = _prepare_lines([long_color + 'A' * 79 + Printer.NORMAL, ''])
+    assert color_printer._split_lines(original_lines) == [long_color + 'A' * 79 + Printer.NORMAL + '\n', '\n']
+
+
+def test_split_lines_keeps_color_only_lines(color_printer):
+    """
+    Test that a line of only a color code isn't merged into the previous (unwrapped) line.
+    """
+    original_lines = (Printer.RED + 'abc\n' + Printer.GREEN + '\nxyz\n').splitlines(True)
+    assert color_printer._split_lines(original_lines) == [Printer.RED + 'abc\n', Printer.GREEN + '\n', 'xyz\n']
+    # A color left over by the wrapping is still attached to the line's last part.
+    original_lines = ['A' * 79 + Printer.GREEN + '\n']
+    assert color_printer._split_lines(original_lines) == ['A' * 79 + Printer.GREEN + '\n']
+
+
+def test_raw_printer():
+    output = StringIO()
+    raw_printer = Printer(DefaultWriter(output), raw=True)
+    raw_printer.write_line('first ' + raw_printer.red('line'))
+    with raw_printer.group(indent=2):
+        raw_printer.write_line(Printer.YELLOW + 'second' + '!' * 100 + '\nthird')
+    raw_printer.write_line('fourth')
+    assert output.getvalue() == 'first line\n  second' + '!' * 100 + '\n  third\nfourth\n'
+
+
+def test_get_printer_raw_detection(monkeypatch):
+    monkeypatch.setattr(printer, '_printers', {})
+    monkeypatch.setattr(printer, '_IN_QT', False)
+    monkeypatch.setattr('sys.stdout', StringIO())
+    assert pyprinter.get_printer()._raw
+    assert not pyprinter.get_printer(raw=False)._raw
+
+
+def test_get_printer_pool(monkeypatch):
+    monkeypatch.setattr(printer, '_printers', {})
+    default_printer = pyprinter.get_printer(raw=False)
+    with default_printer.group(indent=4):
+        assert pyprinter.get_printer(colors=False, raw=False) is not default_printer
+        assert pyprinter.get_printer(raw=False) is default_printer
+        assert default_printer.indents_sum == 4
+
+
+def test_disabled_printer(monkeypatch):
+    monkeypatch.setattr(printer, '_printers', {})
+    output = StringIO()
+    disabled_printer = pyprinter.get_printer(disabled=True, writer=DefaultWriter(output))
+    disabled_printer.write_line('test')
+    disabled_printer.write_aligned_many({'key': 'value'})
+    # Nothing is laid out for a disabled printer (not even the console width is queried).
+    monkeypatch.setattr(printer, 'get_console_width', None)
+    disabled_printer.write_aligned('key', 'value')
+    assert output.getvalue() == ''
+    assert pyprinter.get_printer(disabled=True) is not pyprinter.get_printer()
+
+
+def test_get_printer_releases_writers(monkeypatch):
+    monkeypatch.setattr(printer, '_writer_printers', weakref.WeakValueDictionary())
+    writer = DefaultWriter(StringIO())
+    writer_printer = pyprinter.get_printer(writer=writer, raw=False)
+    assert pyprinter.get_printer(writer=writer, raw=False) is writer_printer
+    writer_reference = weakref.ref(writer)
+    del writer, writer_printer
+    gc.collect()
+    assert writer_reference() is None
+    assert len(printer._writer_printers) == 0
+
+
+def test_write_object():
+    output = StringIO()
+    test_printer = Printer(DefaultWriter(output), colors=False, width_limit=False)
+    obj = {'name': 'x' * 100, 'values': list(range(10)), 'nested': {'empty': [], 'tuple': (1, 'a')}}
+    obj['nested']['parent'] = obj
+    test_printer.write_object(obj, max_items=3, max_string=5)
+    assert output.getvalue() == """{
+    'name': 'xxxxx'...,
+    'values': [
+        0,
+        1,
+        2,
+        ... (7 more)
+    ],
+    'nested': {
+        'empty': [],
+        'tuple': (
+            1,
+            'a',
+        ),
+        'parent': <Recursion on dict with id=%d>,
+    },
+}
+""" % id(obj)
+    assert test_printer.indents_sum == 0
+
+
+def test_write_object_lazy():
+    output = StringIO()
+    test_printer = Printer(DefaultWriter(output), colors=False, width_limit=False)
+    infinite_iterator = iter(int, 1)
+    test_printer.write_object({'items': infinite_iterator, 'deep': [[[1]]]}, max_items=2, max_depth=2)
+    assert output.getvalue() == "{\n    'items': [\n        0,\n        0,\n        ...\n    ],\n" \
+                                "    'deep': [\n        [...],\n    ],\n}\n"
@@ -0,0 +1,83 @@
+from io import StringIO
+
+import pytest
+
+from pyprinter import DefaultWriter, Printer, profile, Profile
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _render(profiler):
+    output = StringIO()
+    profiler.pretty_print(Printer(DefaultWriter(output), colors=False, width_limit=False))
+    return output.getvalue()
+
+
+def test_profile_context_manager():
+    with profile(print_report=False, top=3) as profiler:
+        _busy(10000)
+    stats = profiler.get_stats()
+    assert stats[0].name.startswith('_busy (test_profiler.py:')
+    assert stats[0].calls == 1
+    assert all('(profiler.py:' not in function_stats.name for function_stats in stats)
+    report = _render(profiler)
+    assert 'Cumulative %' in report and '_busy' in report
+    assert len(profiler.get_table().data) == 3
+
+
+def test_profile_decorator_accumulates():
+    profiler = Profile(print_report=False, sort_by='calls')
+    busy = profiler(_busy)
+    assert busy(10) == 285
+    busy(10)
+    assert next(stats for stats in profiler.get_stats() if stats.name.startswith('_busy')).calls == 2
+    csv_string = profiler.get_as_csv()
+    assert csv_string.splitlines()[0] == ','.join(Profile._COLUMNS)
+
+
+def test_profile_recursive_function():
+    output = StringIO()
+    profiler = Profile(printer=Printer(DefaultWriter(output), colors=False, width_limit=False))
+
+    @profiler
+    def countdown(n):
+        if n > 0:
+            countdown(n - 1)
+        # Called after the inner calls returned, so it's only profiled if they didn't stop the profiling.
+        _busy(10)
+
+    countdown(3)
+    calls = {stats.name.split(' ')[0]: stats.calls for stats in profiler.get_stats()}
+    assert calls['countdown'] == 4 and calls['_busy'] == 4
+    # The report is printed once, when the outermost call returns.
+    assert output.getvalue().count('Total wall time') == 1
+    assert profiler._depth == 0
+
+
+def test_profile_bare_decorator(monkeypatch):
+    output = StringIO()
+    monkeypatch.setattr('pyprinter.profiler.get_printer', lambda: Printer(DefaultWriter(output), colors=False))
+
+    @profile
+    def decorated():
+        return _busy(100)
+
+    decorated()
+    assert '_busy' in output.getvalue()
+
+
+def test_profile_sampling():
+    with profile(mode='sampling', print_report=False) as profiler:
+        _busy(300000)
+    stats = profiler.get_stats()
+    assert any(function_stats.name.startswith('_busy') for function_stats in stats)
+    assert all(function_stats.calls is None for function_stats in stats)
+
+
+def test_profile_bad_arguments():
+    with pytest.raises(ValueError):
+        Profile(sort_by='name')
+    with pytest.raises(ValueError):
+        Profile(mode='tracing')
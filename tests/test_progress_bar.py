@@ -0,0 +1,248 @@
+import asyncio
+from io import StringIO
+import re
+import sys
+
+import pytest
+
+from pyprinter import AsyncProgressBarIterator, progress_bar, ProgressBar
+from pyprinter.progress_bar import _get_redraw, Rate, Timing
+
+_CURSOR_MOVE_REGEXP = re.compile('\x1b\\[(\\d+)([CD])')
+
+
+def _apply(line: str, cursor: int, text: str):
+    """
+    Emulates a terminal line receiving the text.
+    """
+    line = list(line)
+    i = 0
+    while i < len(text):
+        move = _CURSOR_MOVE_REGEXP.match(text, i)
+        if move:
+            cursor += int(move.group(1)) * (1 if move.group(2) == 'C' else -1)
+            i = move.end()
+            continue
+        if text[i] == '\r':
+            cursor = 0
+        else:
+            line[cursor:cursor + 1] = text[i]
+            cursor += 1
+        i += 1
+    return ''.join(line), cursor
+
+
+def test_get_redraw():
+    previous_frame = '####------  40% elapsed: 00:01 left: 00:02'
+    frame = '#####-----  50% elapsed: 00:01 left: 00:01'
+    text, cursor = _get_redraw(previous_frame, frame, len(previous_frame))
+    assert _apply(previous_frame, len(previous_frame), text) == (frame, cursor)
+    assert len(text) < len(frame) // 2
+    assert _get_redraw(frame, frame, cursor) == ('', cursor)
+    # A change in the frame length redraws everything.
+    text, cursor = _get_redraw(frame, 'short', cursor)
+    assert text == '\rshort' + ' ' * (len(frame) - 5)
+
+
+def test_differential_progress_bar(monkeypatch):
+    outputs = {}
+    for differential in (True, False):
+        output = outputs[differential] = StringIO()
+        monkeypatch.setattr(sys, 'stdout', output)
+        progress_bar = ProgressBar(1000, differential=differential, show_default_message=False)
+        for i in range(1000):
+            progress_bar.eval(i)
+        progress_bar.finish()
+    full_lines = outputs[False].getvalue().split('\r')
+    assert _apply('', 0, outputs[True].getvalue().rstrip('\n'))[0] == full_lines[-1].rstrip('\n')
+    assert len(outputs[True].getvalue()) * 10 < len(outputs[False].getvalue())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A fake monotonic clock, which is advanced by the tests.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(progress_bar.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_differential_default(monkeypatch):
+    monkeypatch.setattr(sys, 'stdout', StringIO())
+    assert not ProgressBar(10)._differential
+
+
+def test_differential_full_redraw(monkeypatch, clock):
+    output = StringIO()
+    monkeypatch.setattr(sys, 'stdout', output)
+    monkeypatch.setattr(progress_bar, 'get_console_width', lambda: 100)
+    bar = ProgressBar(1000, differential=True, show_default_message=False)
+    bar.eval(1)
+    bar.eval(2)
+    assert output.getvalue().count('\r') == 1
+    # Something else was printed, the next full redraw fixes the line.
+    clock[0] += ProgressBar._FULL_REDRAW_INTERVAL
+    bar.eval(3)
+    assert output.getvalue().count('\r') == 2
+    # A console width change is picked up by the next full redraw.
+    monkeypatch.setattr(progress_bar, 'get_console_width', lambda: 120)
+    bar.eval(4)
+    previous_length = len(bar._last_frame)
+    clock[0] += ProgressBar._FULL_REDRAW_INTERVAL
+    bar.eval(5)
+    assert len(bar._last_frame) == previous_length + 20
+    assert output.getvalue().rsplit('\r', 1)[1] == bar._last_frame
+
+
+def test_rate(clock):
+    rate = Rate(smoothing=0.5)
+    assert rate.eval(0) == '        ? it/s'
+    clock[0] += 1
+    assert rate.eval(100) == '    100.0 it/s'
+    clock[0] += 1
+    # The new rate (300 per second) weighs half.
+    assert rate.eval(400) == '    200.0 it/s'
+    clock[0] += 0.01
+    # Updates which are too close to the previous one don't change the rate.
+    assert rate.eval(10000) == '    200.0 it/s'
+    assert len(rate.eval(None)) == rate.width
+
+
+def test_bytes_rate(clock):
+    rate = Rate(track_bytes=True)
+    rate.eval(0)
+    clock[0] += 2
+    assert rate.eval(3 * 1024 ** 2) == '   1.5 MB/s'
+
+
+def test_moving_average_time_left(clock):
+    timing = Timing(100, smoothing=1)
+    average_timing = Timing(100)
+    for meter in (timing, average_timing):
+        meter.eval(0)
+    clock[0] += 50
+    for meter in (timing, average_timing):
+        meter.eval(10)
+    # The progress speeds up from 10 units in 50 seconds to 40 units in 10 seconds.
+    clock[0] += 10
+    assert timing.eval(50) == 'elapsed: 01:00 left: 00:12'
+    assert average_timing.eval(50) == 'elapsed: 01:00 left: 01:00'
+
+
+def test_wrap_file(tmp_path, monkeypatch):
+    output = StringIO()
+    monkeypatch.setattr(sys, 'stdout', output)
+    input_file_path = tmp_path / 'input.bin'
+    input_file_path.write_bytes(bytes(range(256)) * 1024)
+    buffer = bytearray(1000)
+    with ProgressBar.wrap_file(open(str(input_file_path), 'rb'), differential=False) as input_file:
+        assert input_file.progress_bar.total == 256 * 1024
+        assert input_file.read(24) == bytes(range(24))
+        # readinto fills the given buffer.
+        assert input_file.readinto(memoryview(buffer)[:100]) == 100
+        assert buffer[:100] == bytes(range(24, 124))
+        input_file.seek(0)
+        data = b''.join(iter(lambda: input_file.read(4096), b''))
+    assert input_file.bytes_count == 124 + len(data)
+    assert input_file.closed
+    assert output.getvalue().split('\r')[-1].startswith('#' * 20 + ' 100%')
+
+
+def test_wrap_file_for_writing(tmp_path, monkeypatch):
+    output = StringIO()
+    monkeypatch.setattr(sys, 'stdout', output)
+    with ProgressBar.wrap_file(open(str(tmp_path / 'output.bin'), 'wb'), differential=False,
+                               min_interval=0) as output_file:
+        # The new file is empty, which says nothing about how much will be written.
+        assert output_file.progress_bar.total is None
+        for _ in range(5):
+            output_file.write(b'x' * 1000)
+    assert output_file.bytes_count == 5000
+    assert '59:5' not in output.getvalue() and 'left:     ?' in output.getvalue()
+
+
+def test_wrap_stream(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'stdout', StringIO())
+    with ProgressBar.wrap_stream(open(str(tmp_path / 'output.txt'), 'w')) as output_file:
+        output_file.write('Hello ')
+        output_file.write('World!')
+    assert output_file.progress_bar.total is None
+    assert output_file.bytes_count == 12
+    assert (tmp_path / 'output.txt').read_text() == 'Hello World!'
+
+
+async def _async_range(count: int):
+    for i in range(count):
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_async_progress_bar_iterator(monkeypatch):
+    output = StringIO()
+    monkeypatch.setattr(sys, 'stdout', output)
+
+    async def run():
+        progress = AsyncProgressBarIterator(_async_range(1000), total=1000, differential=False)
+        items = [item async for item in progress]
+        return items, progress
+
+    items, progress = asyncio.run(run())
+    assert items == list(range(1000))
+    assert progress.count == 1000
+    frames = output.getvalue().split('\r')
+    # Drawing is done by the refreshing task, not once per item.
+    assert len(frames) < 100
+    assert frames[-1].startswith('#' * 20 + ' 100%')
+
+
+def test_async_progress_bar_iterator_break(monkeypatch):
+    monkeypatch.setattr(sys, 'stdout', StringIO())
+
+    async def run():
+        async with AsyncProgressBarIterator(_async_range(1000)) as progress:
+            async for item in progress:
+                if item == 10:
+                    break
+        # The refreshing task was stopped.
+        return len(asyncio.all_tasks())
+
+    assert asyncio.run(run()) == 1
+
+    async def run_without_closing():
+        progress = AsyncProgressBarIterator(_async_range(1000), refresh_interval=0.01)
+        async for item in progress:
+            if item == 10:
+                break
+        # The refreshing task stops by itself after a few idle refreshes.
+        await asyncio.sleep(0.01 * AsyncProgressBarIterator._MAX_IDLE_REFRESHES * 4)
+        tasks_count = len(asyncio.all_tasks())
+        # And restarts with the next item.
+        item = await progress.__anext__()
+        await progress.aclose()
+        return tasks_count, item, progress.count
+
+    assert asyncio.run(run_without_closing()) == (1, 11, 12)
+
+
+def test_async_gather_and_as_completed(monkeypatch):
+    monkeypatch.setattr(sys, 'stdout', StringIO())
+
+    async def job(i: int):
+        await asyncio.sleep((10 - i) * 0.005)
+        if i == 3:
+            raise ValueError(i)
+        return i
+
+    async def run():
+        results = await AsyncProgressBarIterator.gather(*[job(i) for i in range(10)], return_exceptions=True)
+        completed = []
+        with pytest.raises(ValueError):
+            async for result in AsyncProgressBarIterator.as_completed([job(i) for i in range(10)]):
+                completed.append(result)
+        return results, completed
+
+    results, completed = asyncio.run(run())
+    assert results[:3] == [0, 1, 2] and isinstance(results[3], ValueError) and results[4:] == list(range(4, 10))
+    # The jobs complete in reverse order.
+    assert completed == list(range(9, 3, -1))
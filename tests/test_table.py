@@ -0,0 +1,304 @@
+from datetime import datetime
+import gzip
+from io import StringIO
+import sqlite3
+
+import pytest
+
+from pyprinter import DefaultWriter, FileSize, LiveTable, printer, Printer, Table, TableDiff
+from pyprinter.external.prettytable import _str_block_width
+from pyprinter.table import _compile_column_type
+
+
+def _make_data(rows_count):
+    return [{'name': f'row {i}', 'value': 'x' * (i * 7 % 50), 'text': f'multi\nline {i}' if i % 3 else str(i)}
+            for i in range(rows_count)]
+
+
+def _render(table, **kwargs):
+    output = StringIO()
+    table.pretty_print(Printer(DefaultWriter(output), colors=False, width_limit=False), **kwargs)
+    return output.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def fixed_console_width(monkeypatch):
+    monkeypatch.setattr(printer, 'get_console_width', lambda: 80)
+    monkeypatch.setattr('pyprinter.table.get_console_width', lambda: 80)
+
+
+@pytest.mark.parametrize('border', [False, True])
+@pytest.mark.parametrize('align', [Table.ALIGN_CENTER, Table.ALIGN_LEFT, Table.ALIGN_RIGHT])
+@pytest.mark.parametrize('headers_color', [Printer.NORMAL, Printer.CYAN])
+def test_live_table_matches_table(border, align, headers_color):
+    """
+    Test that incrementally appending rows (some of which widen or wrap columns) renders like a regular table.
+    """
+    data = _make_data(20)
+    column_size_map = {'value': 30}
+    live_table = LiveTable('Test', ['name', 'value', 'text'], column_size_map=column_size_map,
+                           headers_color=headers_color, align=align, border=border)
+    for row in data:
+        live_table.append(row)
+        expected = _render(Table('Test', live_table.data, column_size_map=column_size_map,
+                                 headers_color=headers_color), align=align, border=border)
+        assert _render(live_table) == expected
+
+
+def test_live_table_new_rows():
+    live_table = LiveTable('Test', ['name', 'value'])
+    output = StringIO()
+    live_table_printer = Printer(DefaultWriter(output), colors=False, width_limit=False)
+    live_table.append({'name': 'a', 'value': 'b'})
+    live_table.pretty_print(live_table_printer)
+    output.truncate(0)
+    output.seek(0)
+    live_table.data.append({'name': 'c', 'value': 'd'})
+    live_table.pretty_print_new_rows(live_table_printer)
+    assert output.getvalue() == '  c      d   \n'
+
+
+def test_live_table_rows_by_columns():
+    live_table = LiveTable('Test', ['name', 'size'])
+    live_table.append({'name': 'a', 'size': '1'})
+    live_table.append({'size': '2', 'name': 'b'})
+    live_table.append({'name': 'c'})
+    assert live_table.rows == [['a', '1'], ['b', '2'], ['c', '']]
+    expected = Table('Test', [{'name': 'a', 'size': '1'}, {'name': 'b', 'size': '2'}, {'name': 'c', 'size': ''}])
+    assert _render(live_table) == _render(expected)
+    assert live_table.get_as_csv().splitlines() == ['name,size', 'a,1', 'b,2', 'c,']
+
+
+@pytest.mark.parametrize('border', [False, True])
+@pytest.mark.parametrize('headers_color', [Printer.NORMAL, Printer.CYAN])
+def test_parallel_pretty_print(border, headers_color):
+    """
+    Test that formatting the rows in parallel renders exactly like the serial path.
+    """
+    table = Table('Test', _make_data(100), column_size_map={'value': 30}, headers_color=headers_color)
+    assert _render(table, border=border, workers=3) == _render(table, border=border)
+
+
+def test_disabled_printer(monkeypatch, files_table):
+    live_table = LiveTable('Test', ['name'], [{'name': 'row'}])
+    diff = files_table.diff(Table('Files', []))
+    # Nothing is rendered for a disabled printer.
+    monkeypatch.setattr(Table, '_get_colored_rows', None)
+    monkeypatch.setattr(LiveTable, '_render_new_rows', None)
+    monkeypatch.setattr(TableDiff, 'get_table', None)
+    disabled_printer = Printer(DefaultWriter(StringIO()), disabled=True)
+    for table in (files_table, live_table, diff):
+        table.pretty_print(disabled_printer)
+    files_table.pretty_print(disabled_printer, workers=2)
+    live_table.pretty_print_new_rows(disabled_printer)
+
+
+def test_parallel_csv(tmp_path):
+    table = Table('Test', _make_data(100))
+    output_file_path = str(tmp_path / 'table.csv')
+    assert table.get_as_csv(output_file_path, workers=3) == table.get_as_csv()
+    with open(output_file_path, 'r', newline='') as output_file:
+        assert output_file.read() == table.get_as_csv()
+
+
+def test_compressed_csv(tmp_path):
+    table = Table('Test', _make_data(100))
+    output_file_path = str(tmp_path / 'table.csv.gz')
+    assert table.get_as_csv(output_file_path, compression='gzip') is None
+    with gzip.open(output_file_path, 'rt', newline='') as output_file:
+        assert output_file.read() == table.get_as_csv()
+    with pytest.raises(ValueError):
+        table.get_as_csv(compression='gzip')
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE test (name TEXT, value INTEGER)')
+    connection.executemany('INSERT INTO test VALUES (?, ?)', ((f'row {i}', i) for i in range(2500)))
+    yield connection
+    connection.close()
+
+
+def test_from_cursor(connection):
+    table = Table.from_cursor(connection.execute('SELECT * FROM test'), 'Test', fetch_size=1000)
+    dict_table = Table('Test', [{'name': f'row {i}', 'value': i} for i in range(2500)])
+    assert table.columns == ['name', 'value']
+    assert table.data[2] == {'name': 'row 2', 'value': 2}
+    assert len(table.data) == 2500
+    assert _render(table) == _render(dict_table)
+    assert table.get_as_csv() == dict_table.get_as_csv()
+
+
+def test_write_cursor_as_csv(connection, tmp_path):
+    output_file_path = str(tmp_path / 'test.csv')
+    assert Table.write_cursor_as_csv(connection.execute('SELECT * FROM test'), output_file_path, fetch_size=100) == 2500
+    with open(output_file_path, newline='') as output_file:
+        assert output_file.read() == Table.from_cursor(connection.execute('SELECT * FROM test')).get_as_csv()
+
+
+def test_repr_html():
+    table = Table('Test <1>', _make_data(1000))
+    table.display_head_rows = 2
+    table.display_tail_rows = 1
+    table_html = table._repr_html_()
+    assert '<caption>Test &lt;1&gt;</caption>' in table_html
+    assert table_html.count('<tr><td>') == 3
+    assert '<td>row 0</td>' in table_html and '<td>row 1</td>' in table_html and '<td>row 999</td>' in table_html
+    assert '997 more rows' in table_html
+    data, metadata = table._repr_mimebundle_()
+    assert data['text/html'] is table_html
+    assert metadata['text/html'] == {'rows': 1000, 'columns': 3, 'shown_rows': 3}
+    # Appending rows is detected, and changing existing ones requires an invalidation.
+    table.data.append({'name': 'new row', 'value': '', 'text': ''})
+    assert '<td>new row</td>' in table._repr_html_()
+    table.data[-1]['name'] = 'changed row'
+    assert '<td>changed row</td>' not in table._repr_html_()
+    table.invalidate()
+    assert '<td>changed row</td>' in table._repr_html_()
+
+
+def test_repr_html_hidden_rows_not_accessed():
+    class WindowOnlyRows(list):
+        def __iter__(self):
+            raise AssertionError('All the rows were iterated')
+
+        def __getitem__(self, index):
+            accessed.append(index)
+            return super().__getitem__(index)
+
+    accessed = []
+    table = Table('Test', WindowOnlyRows(_make_data(1000)))
+    table._repr_html_()
+    assert slice(None, 10) in accessed and slice(990, None) in accessed
+    assert all(isinstance(index, slice) or index == 0 for index in accessed)
+
+
+@pytest.fixture
+def files_table():
+    return Table('Files', [{'owner': owner, 'size': str(size), 'name': f'file {i}'}
+                           for i, (owner, size) in enumerate([('root', 10), ('user', 300), ('root', 20), ('admin', 5),
+                                                              ('user', 40), ('root', 20)])])
+
+
+def test_where(files_table):
+    view = files_table.where(owner='root')
+    assert list(view.indexes) == [0, 2, 5]
+    assert view.rows == [['root', '10', 'file 0'], ['root', '20', 'file 2'], ['root', '20', 'file 5']]
+    assert list(files_table.where(owner={'root', 'admin'}, size='20').indexes) == [2, 5]
+    assert list(files_table.where(owner=['root', 'root']).indexes) == [0, 2, 5]
+    assert list(files_table.where(lambda row: int(row['size']) > 15).where(owner='root').indexes) == [2, 5]
+    assert len(files_table.where(owner='nobody').data) == 0
+    assert files_table.where(owner='nobody').columns == ['owner', 'size', 'name']
+    assert _render(view) == _render(Table('Files', [files_table.data[i] for i in (0, 2, 5)]))
+
+
+def test_sort_by(files_table):
+    assert list(files_table.sort_by('size').indexes) == [0, 2, 5, 1, 4, 3]
+    assert list(files_table.sort_by('size', key=int, reverse=True).indexes) == [1, 4, 2, 5, 0, 3]
+    assert list(files_table.where(owner='user').sort_by('size').indexes) == [1, 4]
+    # Missing values are sorted last in both directions.
+    table = Table('Sizes', [{'size': size} for size in (2, None, 3, 1)])
+    assert list(table.sort_by('size').indexes) == [3, 0, 2, 1]
+    assert list(table.sort_by('size', reverse=True).indexes) == [2, 0, 3, 1]
+    assert list(table.where(lambda row: True).sort_by('size', reverse=True).indexes) == [2, 0, 3, 1]
+    # The sorted index is cached, until the table changes.
+    assert files_table._get_sorted_index('size') is files_table._get_sorted_index('size')
+    files_table.data.append({'owner': 'admin', 'size': '0', 'name': 'file 6'})
+    assert files_table.sort_by('size').indexes[0] == 6
+
+
+def test_group_by(files_table):
+    grouped = files_table.group_by('owner').agg(files='count', total_size=('sum', 'size'), biggest=('max', 'size'),
+                                                first=('min', 'name'))
+    assert grouped.columns == ['owner', 'files', 'total_size', 'biggest', 'first']
+    assert grouped.rows == [['root', 3, 50, '20', 'file 0'], ['user', 2, 340, '300', 'file 1'],
+                            ['admin', 1, 5, '5', 'file 3']]
+    assert files_table.where(owner={'root', 'user'}).group_by('owner').agg(files='count').rows == \
+        [['root', 3], ['user', 2]]
+    with pytest.raises(ValueError):
+        files_table.group_by('owner').agg(total=('average', 'size'))
+
+
+def test_group_by_missing_values(connection):
+    connection.execute("INSERT INTO test VALUES ('nulls', NULL)")
+    connection.execute("INSERT INTO test VALUES ('row 7', NULL)")
+    table = Table.from_cursor(connection.execute('SELECT * FROM test'))
+    grouped = {row[0]: row[1:] for row in table.group_by('name').agg(
+        total=('sum', 'value'), smallest=('min', 'value'), biggest=('max', 'value'), rows='count').rows}
+    assert grouped['nulls'] == [0, None, None, 1]
+    assert grouped['row 7'] == [7, 7, 7, 2]
+
+
+def test_diff(files_table):
+    new_data = [dict(row) for row in files_table.data if row['name'] != 'file 3']
+    new_data[0]['size'] = '15'
+    new_data.append({'owner': 'user', 'size': '1', 'name': 'file 6'})
+    diff = files_table.diff(Table('Files', new_data), key='name')
+    assert diff.added == [('user', '1', 'file 6')]
+    assert diff.removed == [('admin', '5', 'file 3')]
+    assert diff.changed == [(('root', '10', 'file 0'), ('root', '15', 'file 0'), [1])]
+    assert diff.get_table(colors=False).rows == [['+', 'user', '1', 'file 6'], ['-', 'admin', '5', 'file 3'],
+                                                 ['~', 'root', '10 -> 15', 'file 0']]
+    assert not files_table.diff(files_table, key=['owner', 'name'])
+    # Without a key, rows are compared as a whole (and identical rows are kept apart).
+    whole_diff = files_table.diff(Table('Files', new_data))
+    assert len(whole_diff.added) == 2 and len(whole_diff.removed) == 2 and not whole_diff.changed
+    with pytest.raises(ValueError):
+        files_table.diff(files_table, key='owner')
+    with pytest.raises(ValueError):
+        files_table.diff(Table('Other', [{'owner': 'root'}]))
+
+
+_TYPED_DATA = [{'name': 'a\nb', 'size': 1536, 'ratio': 0.5, 'modified': datetime(2024, 1, 2, 3, 4), 'count': 7},
+               {'name': 'longer name', 'size': 10, 'ratio': None, 'modified': datetime(2023, 5, 6), 'count': 12345}]
+_COLUMN_TYPES = {'size': FileSize, 'ratio': (float, 2), 'modified': (datetime, '%Y-%m-%d'), 'count': int}
+
+
+@pytest.mark.parametrize('border', [False, True])
+@pytest.mark.parametrize('headers_color', [Printer.NORMAL, Printer.CYAN])
+def test_column_types(border, headers_color):
+    # The size map applies to the first column even when its header is colored.
+    column_size_map = {'name': 6}
+    table = Table('Typed', _TYPED_DATA, column_types=_COLUMN_TYPES, headers_color=headers_color,
+                  column_size_map=column_size_map)
+    output = _render(table, border=border, align=Table.ALIGN_LEFT)
+    assert ' 1.5 KB | ' in output if border else '1.5 KB   0.50  2024-01-02      7' in output
+    # Typed tables are rendered exactly like PrettyTable renders the formatted values.
+    formatted_data = [{'name': row['name'], 'size': str(FileSize(row['size'])),
+                       'ratio': '' if row['ratio'] is None else f'{row["ratio"]:.2f}',
+                       'modified': row['modified'].strftime('%Y-%m-%d'), 'count': str(row['count'])}
+                      for row in _TYPED_DATA]
+    expected_table = Table('Typed', formatted_data, headers_color=headers_color,
+                           column_size_map=column_size_map)._get_pretty_table(
+        align=Table.ALIGN_LEFT, border=border)
+    for column in ('size', 'ratio', 'count'):
+        expected_table.align[column] = 'r'
+    assert table._get_typed_string(align=Table.ALIGN_LEFT, border=border) == expected_table.get_string()
+    assert table._get_parallel_string(2, align=Table.ALIGN_LEFT, border=border) == expected_table.get_string()
+    live_table = LiveTable('Typed', list(_TYPED_DATA[0]), _TYPED_DATA, column_types=_COLUMN_TYPES,
+                           headers_color=headers_color, column_size_map=column_size_map, align=Table.ALIGN_LEFT,
+                           border=border)
+    assert live_table.get_string() == expected_table.get_string()
+    # CSV keeps the raw values.
+    assert '1536,0.5,2024-01-02 03:04:00,7' in table.get_as_csv()
+    with pytest.raises(ValueError):
+        Table('Typed', _TYPED_DATA, column_types={'count': complex})
+    with pytest.raises(ValueError):
+        Table('Typed', _TYPED_DATA, column_types={'count': (int, 2)})
+
+
+def test_column_types_bad_values():
+    formats = {column: _compile_column_type(column_type) for column, column_type in _COLUMN_TYPES.items()}
+    # Values are converted when nothing is lost, and are printed as they are otherwise.
+    assert [formats['count'].formatter(value) for value in (7, '10', 3.0, 3.7, 'n/a', None)] == \
+        ['7', '10', '3', '3.7', 'n/a', '']
+    assert [formats['ratio'].formatter(value) for value in (0.5, '1.5', 'n/a')] == ['0.50', '1.50', 'n/a']
+    assert [formats['size'].formatter(value) for value in (1536, '2 KB', 'n/a')] == ['1.5 KB', '2.0 KB', 'n/a']
+    assert formats['modified'].formatter('日本語') == '日本語'
+    # Wide characters are measured, so the borders stay aligned.
+    data = [{'modified': datetime(2024, 1, 2)}, {'modified': '日本語' * 4}]
+    column_types = {'modified': (datetime, '%Y-%m-%d')}
+    for table_string in (Table('Typed', data, column_types=column_types)._get_typed_string(border=True),
+                         LiveTable('Typed', ['modified'], data, column_types=column_types, border=True).get_string()):
+        assert len({_str_block_width(line) for line in table_string.splitlines()}) == 1
@@ -0,0 +1,106 @@
+import bz2
+import gzip
+from io import BytesIO, StringIO
+import lzma
+
+import pytest
+
+from pyprinter import (CompressedWriter, DedupWriter, DefaultWriter, printer, Printer, RingBufferWriter, TeeSink,
+                       TeeWriter, writers)
+
+
+def test_dedup_writer():
+    output = StringIO()
+    dedup_writer = DedupWriter(DefaultWriter(output), summary_interval=3600)
+    dedup_printer = Printer(dedup_writer, width_limit=False)
+    dedup_printer.write_line(dedup_printer.red('Error!'))
+    for _ in range(99):
+        dedup_printer.write_line(dedup_printer.red('Error!'))
+    dedup_printer.write_line('Recovered')
+    dedup_writer.flush()
+    assert Printer._ANSI_REGEXP.sub('', output.getvalue()) == \
+        'Error!\n' + DedupWriter.SUMMARY_FORMAT.format(99) + 'Recovered\n'
+    assert dedup_writer.suppressed_lines == 99
+
+
+def test_dedup_writer_rate_limit():
+    output = StringIO()
+    dedup_writer = DedupWriter(DefaultWriter(output), rate=0.001, burst=2, key=lambda line: line.split(':')[0])
+    for i in range(10):
+        dedup_writer.write(f'Error: {i}\n')
+    dedup_writer.write('Warning: 1\n')
+    assert output.getvalue() == 'Error: 0\nError: 1\nWarning: 1\n'
+    assert dedup_writer.rate_limited_lines == 8
+
+
+def test_tee_writer(monkeypatch):
+    monkeypatch.setattr(printer, 'get_console_width', lambda: 20)
+    outputs = [StringIO(), StringIO(), StringIO()]
+    with TeeWriter([TeeSink(DefaultWriter(outputs[0])), TeeSink(DefaultWriter(outputs[1]), colors=False),
+                    TeeSink(DefaultWriter(outputs[2]), colors=False, wrapped=False)]) as tee_writer:
+        tee_printer = Printer(tee_writer)
+        with tee_printer.group(indent=2):
+            tee_printer.write_line(tee_printer.red('A' * 30) + ' B')
+    expected_output = StringIO()
+    expected_printer = Printer(DefaultWriter(expected_output))
+    with expected_printer.group(indent=2):
+        expected_printer.write_line(expected_printer.red('A' * 30) + ' B')
+    assert outputs[0].getvalue() == expected_output.getvalue()
+    assert outputs[1].getvalue() == '  ' + 'A' * 17 + '\n  ' + 'A' * 13 + ' B\n'
+    assert outputs[2].getvalue() == '  ' + 'A' * 30 + ' B\n'
+
+
+def test_tee_writer_aligned_many(monkeypatch):
+    monkeypatch.setattr(printer, 'get_console_width', lambda: 20)
+    outputs = [StringIO(), StringIO()]
+    with TeeWriter([TeeSink(DefaultWriter(outputs[0]), colors=False),
+                    TeeSink(DefaultWriter(outputs[1]), colors=False, wrapped=False)]) as tee_writer:
+        Printer(tee_writer).write_aligned_many({'key': 'A' * 20, 'other': 'B'}, align_size=6)
+    assert outputs[0].getvalue() == 'key:  ' + 'A' * 13 + '\n      ' + 'A' * 7 + '\nother:B\n'
+    # The soft line breaks of the aligned values are removed as well.
+    assert outputs[1].getvalue() == 'key:  ' + 'A' * 20 + '\nother:B\n'
+
+
+def test_tee_sink_flushed_at_exit():
+    output = StringIO()
+    sink = TeeSink(DefaultWriter(output))
+    sink.put('text')
+    writers._flush_open_sinks()
+    assert output.getvalue() == 'text'
+    sink.close()
+    assert sink not in writers._open_sinks
+
+
+def test_ring_buffer_writer():
+    ring_buffer_writer = RingBufferWriter(size=50)
+    ring_printer = Printer(ring_buffer_writer, raw=True)
+    for i in range(100):
+        ring_printer.write_line(f'line {i}')
+    assert ring_buffer_writer.tail(3) == ['line 97', 'line 98', 'line 99']
+    assert len(ring_buffer_writer.getvalue()) == 50
+    assert ring_buffer_writer.getvalue().endswith(b'line 98\nline 99\n')
+    output = BytesIO()
+    ring_buffer_writer.dump(output)
+    assert output.getvalue() == ring_buffer_writer.getvalue()
+
+
+@pytest.mark.parametrize('compression, open_function', [('gzip', gzip.open), ('bz2', bz2.open), ('xz', lzma.open)])
+def test_compressed_writer(tmp_path, compression, open_function):
+    output_file_path = str(tmp_path / 'output')
+    # A small chunk size makes the text pass through the compressing thread in many chunks.
+    with CompressedWriter(output_file_path, compression=compression, chunk_size=64) as writer:
+        compressed_printer = Printer(writer, colors=False, width_limit=False)
+        for i in range(1000):
+            compressed_printer.write_line(f'line {i}')
+    with open_function(output_file_path, 'rt') as output_file:
+        assert output_file.read() == ''.join(f'line {i}\n' for i in range(1000))
+
+
+def test_compressed_writer_by_extension(tmp_path):
+    output_file_path = str(tmp_path / 'output.xz')
+    with Printer.to_file(output_file_path, compression='xz') as file_printer:
+        file_printer.write_line('Hello World!')
+    with CompressedWriter(str(tmp_path / 'other.xz')) as writer:
+        assert writer.compression == 'xz'
+    with lzma.open(output_file_path, 'rt') as output_file:
+        assert output_file.read() == 'Hello World!\n'